@@ -0,0 +1,339 @@
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import streamlit as st
+import toml
+
+GRAPH_URL = "https://graph.facebook.com/v19.0"
+
+# Graph API accepts at most 50 requests in one batch call
+BATCH_SIZE = 50
+
+# Concurrent requests (batch calls and pagination); keep low, the rate limit is per app and per page
+MAX_WORKERS = 4
+
+# Retries with exponential backoff when the Graph API reports throttling
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+RATE_LIMIT_CODES = {4, 17, 32, 613, 80001, 80004}
+
+# Fetched months are cached here, one CSV per month, so re-pulling a range only fetches what's new
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# Page metrics and the column names used by the app (same as facebook_page_sample.csv where possible)
+PAGE_METRICS = {
+    "page_fans": "page_likes",
+    "page_impressions_unique": "post_reach",
+    "page_video_views": "video_views",
+    "page_post_engagements": "engagements",
+}
+
+ADS_FIELDS = ["campaign_name", "adset_name", "impressions", "clicks", "spend", "reach", "ctr", "cpc"]
+
+class GraphAPIError(Exception):
+    """Error returned by the Graph API."""
+
+    def __init__(self, message, code=None, status=None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+    @property
+    def is_rate_limit(self):
+        return self.status == 429 or self.code in RATE_LIMIT_CODES
+
+# Function to get credentials that works both in Streamlit and standalone mode
+def get_facebook_credentials():
+    """
+    Get the Facebook access token, page id, ad account id and Graph API URL
+
+    Returns:
+        dict: Credentials; missing values are None
+    """
+    keys = ["FACEBOOK_ACCESS_TOKEN", "FACEBOOK_PAGE_ID", "FACEBOOK_AD_ACCOUNT_ID", "FACEBOOK_GRAPH_URL"]
+    try:
+        secrets = {key: st.secrets.get(key) for key in keys}
+    except (FileNotFoundError, RuntimeError):
+        # Fallback for direct script execution: read from secrets.toml directly
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        secrets_path = os.path.join(base_dir, '.streamlit', 'secrets.toml')
+        loaded = toml.load(secrets_path) if os.path.exists(secrets_path) else {}
+        secrets = {key: loaded.get(key) for key in keys}
+    return {
+        "access_token": secrets["FACEBOOK_ACCESS_TOKEN"],
+        "page_id": secrets["FACEBOOK_PAGE_ID"],
+        "ad_account_id": secrets["FACEBOOK_AD_ACCOUNT_ID"],
+        "graph_url": secrets["FACEBOOK_GRAPH_URL"] or GRAPH_URL,
+    }
+
+def _http(method, url, params=None, timeout=60):
+    """Send one request to the Graph API and decode the JSON response."""
+    data = None
+    if params and method == "GET":
+        url += ("&" if "?" in url else "?") + urlencode(params)
+    elif params:
+        data = urlencode(params).encode("utf-8")
+    try:
+        with urlopen(Request(url, data=data, method=method), timeout=timeout) as response:
+            return json.loads(response.read())
+    except HTTPError as e:
+        try:
+            error = json.loads(e.read()).get("error", {})
+        except ValueError:
+            error = {}
+        raise GraphAPIError(error.get("message", str(e)), error.get("code"), e.code)
+    except URLError as e:
+        raise GraphAPIError(f"Could not reach the Graph API: {e.reason}")
+
+def _with_backoff(request):
+    """Run a request, retrying with exponential backoff while the Graph API is throttling."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return request()
+        except GraphAPIError as e:
+            if not e.is_rate_limit or attempt == MAX_RETRIES:
+                raise
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt + random.uniform(0, BACKOFF_SECONDS))
+
+def _month_windows(since, until):
+    """Split a date range into the calendar months it overlaps, never past today."""
+    until = min(until, date.today())
+    windows = []
+    start = since.replace(day=1)
+    while start <= until:
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        windows.append((start, min(next_month - timedelta(days=1), date.today())))
+        start = next_month
+    return windows
+
+def _cache_path(cache_dir, cache_key, window):
+    return os.path.join(cache_dir, cache_key, f"{window[0]:%Y-%m-%d}_{window[1]:%Y-%m-%d}.csv")
+
+def _read_cached(path):
+    try:
+        return pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        # Month without any data
+        return pd.DataFrame()
+
+def _fetch_batch(batch, relative_url_for, parse_body, access_token, graph_url, follow_paging):
+    """
+    Fetch the first page of one batch of windows with a single Graph API batch call
+
+    Returns:
+        dict: window -> (list of row dicts, URL of the next page or None)
+    """
+    relative_urls = [relative_url_for(since, until) for since, until in batch]
+    responses = _with_backoff(partial(_http, "POST", graph_url.rstrip("/") + "/", {
+        "access_token": access_token,
+        "include_headers": "false",
+        "batch": json.dumps([{"method": "GET", "relative_url": url} for url in relative_urls]),
+    }))
+
+    rows_by_window = {}
+    for window, relative_url, item in zip(batch, relative_urls, responses):
+        if item and item.get("code") == 200:
+            body = json.loads(item["body"])
+        else:
+            # Failed (often throttled) inside the batch: retry this request on its own
+            body = _with_backoff(partial(_http, "GET", f"{graph_url.rstrip('/')}/{relative_url}",
+                                         {"access_token": access_token}))
+        next_url = body.get("paging", {}).get("next") if follow_paging else None
+        rows_by_window[window] = (parse_body(body), next_url)
+    return rows_by_window
+
+def _follow_paging(next_url, parse_body):
+    """
+    Fetch the remaining pages of one window by following its cursor links
+
+    Returns:
+        list: Row dicts from every page after the first
+    """
+    rows = []
+    while next_url:
+        # The next link already carries the cursor and access token
+        body = _with_backoff(partial(_http, "GET", next_url))
+        rows.extend(parse_body(body))
+        next_url = body.get("paging", {}).get("next")
+    return rows
+
+def _fetch_range(cache_key, since, until, relative_url_for, parse_body, access_token, graph_url,
+                 follow_paging, cache_dir, max_workers):
+    """
+    Fetch a date range month by month, reusing cached months and fetching the rest concurrently
+
+    Returns:
+        pandas.DataFrame: All rows in the range, one per (date, ...) as produced by parse_body
+    """
+    windows = _month_windows(since, until)
+    frames = {}
+    missing = []
+    for window in windows:
+        path = _cache_path(cache_dir, cache_key, window)
+        if os.path.exists(path):
+            frames[window] = _read_cached(path)
+        else:
+            missing.append(window)
+
+    def store(window, rows):
+        df = pd.DataFrame(rows)
+        frames[window] = df
+        # The current month is still changing, only cache completed months
+        if window[1] < date.today():
+            path = _cache_path(cache_dir, cache_key, window)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_csv(path, index=False)
+
+    # Spread the missing months over the workers instead of filling one batch of 50
+    batch_size = min(BATCH_SIZE, max(1, math.ceil(len(missing) / max_workers)))
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    fetch = partial(_fetch_batch, relative_url_for=relative_url_for, parse_body=parse_body,
+                    access_token=access_token, graph_url=graph_url, follow_paging=follow_paging)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Each window's remaining pages are a cursor chain of their own, followed on the pool
+        # so that windows page concurrently
+        chains = {}
+        for rows_by_window in pool.map(fetch, batches):
+            for window, (rows, next_url) in rows_by_window.items():
+                if next_url:
+                    chains[window] = (rows, pool.submit(_follow_paging, next_url, parse_body))
+                else:
+                    store(window, rows)
+        for window, (rows, future) in chains.items():
+            store(window, rows + future.result())
+
+    non_empty = [frames[window] for window in windows if not frames[window].empty]
+    if not non_empty:
+        return pd.DataFrame()
+    df = pd.concat(non_empty, ignore_index=True)
+    dates = pd.to_datetime(df["date"]).dt.date
+    return df[(dates >= since) & (dates <= until)].reset_index(drop=True)
+
+def _cache_key(kind, object_id, fields):
+    digest = hashlib.sha1(",".join(fields).encode("utf-8")).hexdigest()[:10]
+    return f"{kind}_{object_id}_{digest}"
+
+def _parse_page_insights(metrics, body):
+    """Turn a page insights response into one row dict per day."""
+    rows = {}
+    for metric in body.get("data", []):
+        column = metrics.get(metric["name"], metric["name"])
+        for value in metric.get("values", []):
+            # end_time marks the end of the reported day
+            day = (datetime.strptime(value["end_time"][:10], "%Y-%m-%d").date() - timedelta(days=1)).isoformat()
+            reported = value.get("value")
+            if isinstance(reported, dict):  # breakdown metrics: keep the total
+                reported = sum(v for v in reported.values() if isinstance(v, (int, float)))
+            rows.setdefault(day, {"date": day})[column] = reported
+    return [rows[day] for day in sorted(rows)]
+
+def _parse_ads_insights(body):
+    """Turn an ads insights response into row dicts with a date column."""
+    rows = []
+    for row in body.get("data", []):
+        row = dict(row)
+        row["date"] = row.pop("date_start", None)
+        row.pop("date_stop", None)
+        rows.append(row)
+    return rows
+
+def fetch_page_insights(page_id, access_token, since, until, metrics=None, graph_url=GRAPH_URL,
+                        cache_dir=CACHE_DIR, max_workers=MAX_WORKERS):
+    """
+    Fetch daily Page insights for a date range
+
+    Args:
+        page_id (str): Facebook Page id
+        access_token (str): Page access token
+        since (datetime.date): First day to include
+        until (datetime.date): Last day to include
+        metrics (dict, optional): Graph metric name -> column name, defaults to PAGE_METRICS
+        graph_url (str): Graph API base URL (point at a mock server for testing)
+        cache_dir (str): Folder for cached months
+        max_workers (int): Maximum concurrent requests (batch calls and pagination)
+
+    Returns:
+        pandas.DataFrame: One row per day with a date column and one column per metric
+    """
+    metrics = metrics or PAGE_METRICS
+
+    def relative_url_for(window_since, window_until):
+        return f"{page_id}/insights?" + urlencode({
+            "metric": ",".join(metrics),
+            "period": "day",
+            "since": window_since.isoformat(),
+            "until": (window_until + timedelta(days=1)).isoformat(),
+        })
+
+    # Page insights "next" links move the time window forward instead of paging, so don't follow them
+    df = _fetch_range(_cache_key("page", page_id, list(metrics)), since, until, relative_url_for,
+                      partial(_parse_page_insights, metrics), access_token, graph_url,
+                      False, cache_dir, max_workers)
+    return df.sort_values("date").reset_index(drop=True) if not df.empty else df
+
+def fetch_ads_insights(ad_account_id, access_token, since, until, fields=None, level="campaign",
+                       graph_url=GRAPH_URL, cache_dir=CACHE_DIR, max_workers=MAX_WORKERS):
+    """
+    Fetch daily Ads insights for an ad account
+
+    Args:
+        ad_account_id (str): Ad account id, with or without the "act_" prefix
+        access_token (str): Access token with ads_read permission
+        since (datetime.date): First day to include
+        until (datetime.date): Last day to include
+        fields (list, optional): Insights fields, defaults to ADS_FIELDS
+        level (str): Aggregation level: account, campaign, adset or ad
+        graph_url (str): Graph API base URL (point at a mock server for testing)
+        cache_dir (str): Folder for cached months
+        max_workers (int): Maximum concurrent requests (batch calls and pagination)
+
+    Returns:
+        pandas.DataFrame: One row per day and object at the requested level
+    """
+    fields = fields or ADS_FIELDS
+    account = ad_account_id if str(ad_account_id).startswith("act_") else f"act_{ad_account_id}"
+
+    def relative_url_for(window_since, window_until):
+        return f"{account}/insights?" + urlencode({
+            "fields": ",".join(fields),
+            "level": level,
+            "time_increment": 1,
+            "time_range": json.dumps({"since": window_since.isoformat(), "until": window_until.isoformat()}),
+            "limit": 500,
+        })
+
+    df = _fetch_range(_cache_key(f"ads_{level}", account, fields), since, until, relative_url_for,
+                      _parse_ads_insights, access_token, graph_url, True, cache_dir, max_workers)
+    # The Graph API returns metrics as strings
+    for col in df.columns:
+        if col != "date":
+            converted = pd.to_numeric(df[col], errors="coerce")
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted
+    return df
+
+# This allows the script to be run directly for testing
+if __name__ == "__main__":
+    credentials = get_facebook_credentials()
+    if not credentials["access_token"] or not credentials["page_id"]:
+        print("Missing FACEBOOK_ACCESS_TOKEN / FACEBOOK_PAGE_ID")
+    else:
+        print(f"Fetching the last 90 days of Page insights from {credentials['graph_url']}...")
+        started = time.perf_counter()
+        df = fetch_page_insights(credentials["page_id"], credentials["access_token"],
+                                 date.today() - timedelta(days=90), date.today(),
+                                 graph_url=credentials["graph_url"])
+        print(f"Results: {len(df)} rows in {time.perf_counter() - started:.2f}s")
+        if not df.empty:
+            print(df.head())
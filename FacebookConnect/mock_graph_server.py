@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Mock Graph API - a local stand-in for the Facebook Graph API insights endpoints
+
+Serves deterministic data for Page insights (/{page_id}/insights), Ads insights
+(/act_{id}/insights, with cursor pagination) and batch requests (POST /), with
+optional latency and rate limiting, so facebook_insights.py can be exercised offline:
+    python -m FacebookConnect.mock_graph_server --port 8766 --latency 0.2 --rate-limit 50
+
+then set FACEBOOK_GRAPH_URL = "http://127.0.0.1:8766/v19.0" in secrets.
+"""
+import argparse
+import base64
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+CAMPAIGNS = 20
+RATE_LIMIT_ERROR = {"error": {"message": "(#4) Application request limit reached", "type": "OAuthException", "code": 4}}
+
+def _value(*parts, low=0, high=10_000):
+    """Deterministic pseudo-random integer for a combination of keys."""
+    return low + zlib.crc32("|".join(str(p) for p in parts).encode("utf-8")) % (high - low)
+
+def _days(since, until):
+    day = since
+    while day <= until:
+        yield day
+        day += timedelta(days=1)
+
+class RequestLimiter:
+    """Allows at most `per_second` requests in any one-second window."""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._window = int(time.time())
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        if not self.per_second:
+            return True
+        with self._lock:
+            now = int(time.time())
+            if now != self._window:
+                self._window, self._count = now, 0
+            self._count += 1
+            return self._count <= self.per_second
+
+def page_insights(page_id, query):
+    """Build a Page insights response for one since/until window."""
+    since = date.fromisoformat(query["since"])
+    until = date.fromisoformat(query["until"])  # exclusive, like the Graph API
+    data = []
+    for metric in query["metric"].split(","):
+        data.append({
+            "name": metric,
+            "period": query.get("period", "day"),
+            "values": [
+                {"value": _value(page_id, metric, day), "end_time": f"{day + timedelta(days=1)}T08:00:00+0000"}
+                for day in _days(since, until - timedelta(days=1))
+            ],
+            "id": f"{page_id}/insights/{metric}/day",
+        })
+    return {"data": data}
+
+def ads_insights(account, query, base_url, path):
+    """Build one page of an Ads insights response, with cursor pagination."""
+    time_range = json.loads(query["time_range"])
+    since = date.fromisoformat(time_range["since"])
+    until = date.fromisoformat(time_range["until"])
+    fields = query.get("fields", "impressions").split(",")
+    limit = int(query.get("limit", 25))
+    offset = int(base64.b64decode(query["after"]).decode()) if query.get("after") else 0
+
+    rows = []
+    for day in _days(since, until):
+        for campaign in range(CAMPAIGNS):
+            impressions = _value(account, campaign, day, low=1_000, high=50_000)
+            clicks = _value(account, campaign, day, "clicks", low=10, high=1_000)
+            spend = _value(account, campaign, day, "spend", low=500, high=50_000) / 100
+            values = {
+                "campaign_name": f"Campaign {campaign:02d}",
+                "adset_name": f"Ad set {campaign:02d}-{_value(campaign, high=3)}",
+                "impressions": str(impressions),
+                "clicks": str(clicks),
+                "spend": f"{spend:.2f}",
+                "reach": str(int(impressions * 0.8)),
+                "ctr": f"{clicks / impressions * 100:.4f}",
+                "cpc": f"{spend / clicks:.4f}",
+            }
+            row = {field: values.get(field, "0") for field in fields}
+            row["date_start"] = row["date_stop"] = day.isoformat()
+            rows.append(row)
+
+    page = rows[offset:offset + limit]
+    response = {"data": page, "paging": {}}
+    if offset + limit < len(rows):
+        after = base64.b64encode(str(offset + limit).encode()).decode()
+        response["paging"]["cursors"] = {"after": after}
+        response["paging"]["next"] = f"{base_url}{path}?{urlencode({**query, 'after': after})}"
+    return response
+
+class MockGraphHandler(BaseHTTPRequestHandler):
+    """Request handler for the mock Graph API."""
+
+    # Set per server by serve_mock_graph
+    latency = 0.0
+    limiter = RequestLimiter(0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, relative_url):
+        """Answer one GET request (path plus query) and return (status, payload)."""
+        if not self.limiter.allow():
+            return 400, RATE_LIMIT_ERROR
+        parts = urlsplit(relative_url)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        query.pop("access_token", None)
+        # Accept paths with or without the version prefix
+        path = re.sub(r"^/?(v\d+\.\d+/)?", "", parts.path)
+        version = re.match(r"^/?(v\d+\.\d+/)?", parts.path).group(1) or ""
+
+        match = re.fullmatch(r"(act_\w+)/insights", path)
+        if match:
+            return 200, ads_insights(match.group(1), query, self._base_url(), f"/{version}{path}")
+        match = re.fullmatch(r"(\w+)/insights", path)
+        if match:
+            return 200, page_insights(match.group(1), query)
+        return 404, {"error": {"message": f"Unknown path {parts.path}", "code": 803}}
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        status, payload = self._handle(self.path)
+        self._send_json(status, payload)
+
+    def do_POST(self):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        if "batch" not in form:
+            self._send_json(400, {"error": {"message": "Missing batch parameter", "code": 100}})
+            return
+        responses = []
+        for request in json.loads(form["batch"]):
+            status, payload = self._handle(request["relative_url"])
+            responses.append({"code": status, "body": json.dumps(payload)})
+        self._send_json(200, responses)
+
+def serve_mock_graph(host="127.0.0.1", port=0, latency=0.0, rate_limit=0):
+    """
+    Start the mock Graph API on a background thread
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free one
+        latency (float): Seconds added to every HTTP request
+        rate_limit (int): Requests per second before answering with error code 4, 0 for no limit
+
+    Returns:
+        tuple: (server, graph_url) - call server.shutdown() when done
+    """
+    handler = type("ConfiguredMockGraphHandler", (MockGraphHandler,), {
+        "latency": latency,
+        "limiter": RequestLimiter(rate_limit),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v19.0"
+
+def main():
+    """Main function to parse arguments and run the server in the foreground"""
+    parser = argparse.ArgumentParser(description="Mock Facebook Graph API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every request (default: 0)")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="Requests per second before throttling, 0 for no limit (default: 0)")
+    args = parser.parse_args()
+
+    server, graph_url = serve_mock_graph(args.host, args.port, args.latency, args.rate_limit)
+    print(f"Mock Graph API listening on {graph_url} (started {datetime.now():%H:%M:%S})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
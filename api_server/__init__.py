@@ -0,0 +1,5 @@
+"""
+Asynchronous HTTP API for the DataJar chat and analysis pipeline.
+
+Run with e.g. `uvicorn api_server.app:app --workers 4` from the project root.
+"""
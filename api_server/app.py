@@ -0,0 +1,229 @@
+"""
+DataJar API - dataset upload, streaming chat and PandasAI analysis over HTTP
+
+Sessions live in the store configured by DATAJAR_SESSION_STORE and datasets in
+DATAJAR_DATA_DIR. The default memory:// store is per process, so run a single worker:
+    uvicorn api_server.app:app --host 0.0.0.0 --port 8000
+
+With a shared store, several worker processes can serve the same sessions:
+    DATAJAR_SESSION_STORE=sqlite:///data/sessions.db uvicorn api_server.app:app --workers 4
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from dataset_store import DATA_DIR, has_dataset, load_dataset, parse_dataset_bytes, save_dataset_bytes
+from openai_handler import generate_pandasai_instruction, get_streaming_response
+from pandasai_handler import ask_pandasai, initialize_smart_df
+from session_store import get_session_store
+
+CHARTS_DIR = os.path.join(DATA_DIR, "charts")
+
+# SmartDataframes are per session and dataset, kept for the most recently used ones
+MAX_SMART_DATAFRAMES = 32
+
+app = FastAPI(title="DataJar API")
+store = get_session_store()
+
+_smart_dfs = OrderedDict()
+_smart_dfs_lock = threading.Lock()
+_session_locks = {}
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+class AnalysisRequest(BaseModel):
+    question: str
+
+
+async def _require_session(session_id):
+    session = await run_in_threadpool(store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+async def _active_dataset(session):
+    """Return (content hash, DataFrame) of the session's active dataset, or (None, None)."""
+    name = session["active_dataset"]
+    if not name:
+        return None, None
+    dataset_hash = session["datasets"][name]
+    try:
+        return dataset_hash, await run_in_threadpool(load_dataset, dataset_hash)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail=f"Dataset '{name}' is no longer stored")
+
+
+def _smart_df_for(session_id, dataset_hash, df):
+    """Get (or create) the SmartDataframe and charts folder for a session's dataset."""
+    key = (session_id, dataset_hash)
+    with _smart_dfs_lock:
+        if key in _smart_dfs:
+            _smart_dfs.move_to_end(key)
+            return _smart_dfs[key]
+
+    charts_dir = os.path.join(CHARTS_DIR, session_id)
+    os.makedirs(charts_dir, exist_ok=True)
+    entry = (initialize_smart_df(df, charts_dir=charts_dir), charts_dir)
+
+    with _smart_dfs_lock:
+        entry = _smart_dfs.setdefault(key, entry)
+        while len(_smart_dfs) > MAX_SMART_DATAFRAMES:
+            _smart_dfs.popitem(last=False)
+    return entry
+
+
+def _sse(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chat_history(messages):
+    """Strip stored messages down to what the OpenAI API accepts."""
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.post("/sessions")
+async def create_session():
+    session_id = await run_in_threadpool(store.create)
+    return {"session_id": session_id}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    session = await _require_session(session_id)
+    return {"session_id": session_id, **session}
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    await _require_session(session_id)
+    await run_in_threadpool(store.delete, session_id)
+    _session_locks.pop(session_id, None)
+    return {"deleted": session_id}
+
+
+@app.post("/sessions/{session_id}/datasets")
+async def upload_dataset(session_id: str, file: UploadFile = File(...)):
+    session = await _require_session(session_id)
+    raw_bytes = await file.read()
+    # Parse before storing, so a file that can't be read never lands in the dataset store
+    try:
+        df = await run_in_threadpool(parse_dataset_bytes, raw_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read {file.filename}: {e}")
+    dataset_hash = await run_in_threadpool(save_dataset_bytes, raw_bytes, df)
+
+    session["datasets"][file.filename] = dataset_hash
+    # The first dataset becomes the active one, as in the Streamlit app
+    if not session["active_dataset"]:
+        session["active_dataset"] = file.filename
+    await run_in_threadpool(store.save, session_id, session)
+
+    return {
+        "name": file.filename,
+        "hash": dataset_hash,
+        "rows": int(df.shape[0]),
+        "columns": int(df.shape[1]),
+        "active": session["active_dataset"] == file.filename,
+    }
+
+
+@app.post("/sessions/{session_id}/datasets/{name}/activate")
+async def activate_dataset(session_id: str, name: str):
+    session = await _require_session(session_id)
+    if name not in session["datasets"]:
+        raise HTTPException(status_code=404, detail="Dataset not found in this session")
+    if not has_dataset(session["datasets"][name]):
+        raise HTTPException(status_code=410, detail=f"Dataset '{name}' is no longer stored")
+    session["active_dataset"] = name
+    await run_in_threadpool(store.save, session_id, session)
+    return {"active_dataset": name}
+
+
+@app.post("/sessions/{session_id}/chat")
+async def chat(session_id: str, request: ChatRequest):
+    """Stream the assistant's reply as server-sent events (token ... done)."""
+    session = await _require_session(session_id)
+    _, df = await _active_dataset(session)
+
+    user_message = {"role": "user", "content": request.message}
+    await run_in_threadpool(store.append_message, session_id, user_message)
+    messages = _chat_history(session["messages"]) + [user_message]
+
+    async def events():
+        full_response = ""
+        # get_streaming_response is a blocking generator; pull each chunk on a worker thread
+        async for chunk in iterate_in_threadpool(get_streaming_response(messages, df=df)):
+            full_response += chunk
+            yield _sse("token", {"content": chunk})
+        await run_in_threadpool(store.append_message, session_id, {"role": "assistant", "content": full_response})
+        yield _sse("done", {"content": full_response})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/sessions/{session_id}/analysis")
+async def analysis(session_id: str, request: AnalysisRequest):
+    session = await _require_session(session_id)
+    dataset_hash, df = await _active_dataset(session)
+    if df is None:
+        raise HTTPException(status_code=400, detail="No active dataset in this session")
+
+    # PandasAI finds charts by looking for the newest file, so run one analysis per session at a time
+    lock = _session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        instruction = await run_in_threadpool(generate_pandasai_instruction, request.question, df)
+        sdf, charts_dir = await run_in_threadpool(_smart_df_for, session_id, dataset_hash, df)
+        result = await run_in_threadpool(ask_pandasai, sdf, instruction, charts_dir)
+
+    payload = {"type": result["type"], "instruction": instruction}
+    assistant_message = {"role": "assistant"}
+    if result["type"] == "dataframe":
+        table = result["response"]
+        payload["table"] = json.loads(table.to_json(orient="split", date_format="iso"))
+        assistant_message["content"] = "Here's the requested data analysis result."
+    elif result["type"] == "plot":
+        payload["text"] = str(result["response"])
+        payload["chart_url"] = f"/charts/{session_id}/{os.path.basename(result['filepath'])}"
+        assistant_message["content"] = payload["text"]
+        assistant_message["chart_path"] = result["filepath"]
+    elif result["type"] == "error":
+        payload["error"] = result["response"]
+        assistant_message["content"] = f"Error: {result['response']}"
+    else:
+        payload["text"] = str(result["response"])
+        assistant_message["content"] = payload["text"]
+
+    await run_in_threadpool(store.append_message, session_id, {"role": "user", "content": request.question})
+    await run_in_threadpool(store.append_message, session_id, assistant_message)
+    return payload
+
+
+@app.get("/charts/{session_id}/{filename}")
+async def get_chart(session_id: str, filename: str):
+    path = os.path.join(CHARTS_DIR, os.path.basename(session_id), os.path.basename(filename))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Chart not found")
+    return FileResponse(path, media_type="image/png")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("api_server.app:app", host="0.0.0.0", port=8000)
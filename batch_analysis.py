@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Batch Analysis - answer a list of questions about one dataset without the chat UI
+
+Runs every question through the same pipeline as the chat page
+(classify_user_prompt -> generate_pandasai_instruction -> ask_pandasai) on a
+bounded pool of worker threads, and writes a report with the text answers,
+result tables and charts.
+
+Usage:
+    python batch_analysis.py export.csv questions.txt --output reports/weekly --workers 4 --rpm 60
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from openai_handler import (
+    classify_user_prompt,
+    generate_pandasai_instruction,
+    get_dataframe_metadata,
+    get_openai_response,
+)
+from pandasai_handler import initialize_smart_df, ask_pandasai
+
+
+class RateLimiter:
+    """Token bucket shared by all workers, limiting LLM requests per minute."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller may send its next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def load_questions(path):
+    """
+    Load questions from a text file (one per line, # for comments) or a JSON list
+
+    Args:
+        path (str): Path to the questions file
+
+    Returns:
+        list: Questions in file order
+    """
+    with open(path) as f:
+        if path.endswith(".json"):
+            return [str(q).strip() for q in json.load(f) if str(q).strip()]
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
+def _answer_question(index, question, df, output_dir, limiter, worker_state):
+    """Run one question through the chat pipeline and save its artifacts."""
+    started = time.perf_counter()
+    entry = {"index": index, "question": question}
+
+    # Each worker owns a SmartDataframe and a charts folder, so charts can't be mixed up
+    if not hasattr(worker_state, "sdf"):
+        worker_state.charts_dir = os.path.join(output_dir, "charts", f"worker_{threading.get_ident()}")
+        os.makedirs(worker_state.charts_dir, exist_ok=True)
+        # PandasAI may make several LLM requests per question; each one takes a rate-limit slot
+        worker_state.sdf = initialize_smart_df(df, charts_dir=worker_state.charts_dir,
+                                               before_llm_call=limiter.acquire)
+
+    try:
+        limiter.acquire()
+        mode = classify_user_prompt(question, df=df)
+        entry["mode"] = mode
+
+        if mode != "data_analysis":
+            limiter.acquire()
+            entry["type"] = "text"
+            entry["text"] = get_openai_response([{"role": "user", "content": question}], df=df)
+            return entry
+
+        limiter.acquire()
+        instruction = generate_pandasai_instruction(question, df)
+        entry["instruction"] = instruction
+
+        # Generated code (and chart drawing) runs one worker at a time inside ask_pandasai
+        result = ask_pandasai(worker_state.sdf, instruction, charts_dir=worker_state.charts_dir)
+        entry["type"] = result["type"]
+
+        if result["type"] == "dataframe":
+            table = result["response"]
+            table_path = os.path.join(output_dir, "tables", f"q{index:03d}.csv")
+            table.to_csv(table_path, index=False)
+            entry["table"] = os.path.relpath(table_path, output_dir)
+            entry["text"] = f"{table.shape[0]} rows × {table.shape[1]} columns"
+        elif result["type"] == "plot":
+            entry["text"] = str(result["response"])
+            chart_path = os.path.join(output_dir, "charts", f"q{index:03d}.png")
+            shutil.move(result["filepath"], chart_path)
+            entry["chart"] = os.path.relpath(chart_path, output_dir)
+        elif result["type"] == "error":
+            entry["error"] = result["response"]
+        else:
+            entry["text"] = str(result["response"])
+    except Exception as e:
+        entry["type"] = "error"
+        entry["error"] = str(e)
+    finally:
+        entry["duration_s"] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def _write_markdown(report, path):
+    """Write a human-readable version of the report next to report.json."""
+    lines = [f"# {report['dataset']}", "", f"Generated {report['created']} · {len(report['results'])} questions", ""]
+    for entry in report["results"]:
+        lines += [f"## {entry['index'] + 1}. {entry['question']}", ""]
+        if entry.get("error"):
+            lines += [f"> ❌ {entry['error']}", ""]
+        if entry.get("text"):
+            lines += [entry["text"], ""]
+        if entry.get("table"):
+            lines += [f"Table: [{entry['table']}]({entry['table']})", ""]
+        if entry.get("chart"):
+            lines += [f"![chart]({entry['chart']})", ""]
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def run_batch(df, questions, output_dir, workers=4, requests_per_minute=60, dataset_name="dataset"):
+    """
+    Answer many questions about one dataset concurrently and write a report
+
+    Args:
+        df (pandas.DataFrame): Dataset shared by every question
+        questions (list): Questions to answer
+        output_dir (str): Folder for report.json, report.md, tables/ and charts/
+        workers (int): Maximum number of questions processed at the same time
+        requests_per_minute (int): Shared limit on LLM requests, 0 for no limit
+        dataset_name (str): Name shown in the report
+
+    Returns:
+        dict: The report, also written to output_dir/report.json
+    """
+    os.makedirs(os.path.join(output_dir, "tables"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "charts"), exist_ok=True)
+
+    # Profile the dataset once up front; every worker reuses the cached metadata
+    get_dataframe_metadata(df)
+
+    limiter = RateLimiter(requests_per_minute)
+    worker_state = threading.local()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_answer_question, index, question, df, output_dir, limiter, worker_state)
+            for index, question in enumerate(questions)
+        ]
+        results = [future.result() for future in futures]
+
+    # Per-worker chart folders are only scratch space
+    for name in os.listdir(os.path.join(output_dir, "charts")):
+        if name.startswith("worker_"):
+            shutil.rmtree(os.path.join(output_dir, "charts", name), ignore_errors=True)
+
+    report = {
+        "dataset": dataset_name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": int(df.shape[0]),
+        "columns": int(df.shape[1]),
+        "duration_s": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+    with open(os.path.join(output_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    _write_markdown(report, os.path.join(output_dir, "report.md"))
+    return report
+
+
+def main():
+    """Main function to parse arguments and run the batch"""
+    parser = argparse.ArgumentParser(description="DataJar batch analysis")
+    parser.add_argument("dataset", help="CSV file to analyze")
+    parser.add_argument("questions", help="Text file with one question per line, or a JSON list")
+    parser.add_argument("--output", "-o", default=None,
+                        help="Report folder (default: reports/<dataset>_<timestamp>)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Questions processed concurrently (default: 4)")
+    parser.add_argument("--rpm", type=int, default=60,
+                        help="Maximum LLM requests per minute across all workers, 0 for no limit (default: 60)")
+    args = parser.parse_args()
+
+    dataset_name = os.path.basename(args.dataset)
+    output_dir = args.output or os.path.join(
+        "reports", f"{os.path.splitext(dataset_name)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+    df = pd.read_csv(args.dataset)
+    questions = load_questions(args.questions)
+    print(f"Running {len(questions)} questions on {dataset_name} ({df.shape[0]} rows) with {args.workers} workers...")
+
+    report = run_batch(df, questions, output_dir, args.workers, args.rpm, dataset_name)
+    failed = sum(1 for entry in report["results"] if entry.get("type") == "error")
+    print(f"Done in {report['duration_s']}s - {len(questions) - failed} answered, {failed} failed")
+    print(f"Report written to {os.path.join(output_dir, 'report.md')}")
+
+
+if __name__ == "__main__":
+    main()
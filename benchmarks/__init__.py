@@ -0,0 +1,7 @@
+"""
+Offline benchmark suite for DataJar.
+
+Runs the data pipeline against synthetic ad/campaign datasets with the OpenAI
+and PandasAI LLMs replaced by deterministic local fakes, so timings only
+reflect the work done inside this repository.
+"""
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI server - a local stand-in for the Chat Completions API
+
+Serves POST /v1/chat/completions (plain and streaming) with the deterministic
+replies from benchmarks.fakes, after a configurable latency. Point the app at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_BASE=http://127.0.0.1:8765/v1
+
+Usage:
+    python -m benchmarks.fake_openai_server --port 8765 --latency 0.8 --jitter 0.2
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fakes import fake_reply
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler answering chat completion calls with canned replies."""
+
+    # Set per server by serve_fake_openai
+    latency = 0.0
+    jitter = 0.0
+    token_delay = 0.0
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep load-test output readable
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-3.5-turbo")
+        reply = fake_reply(messages)
+
+        # Time to first token
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if body.get("stream"):
+            self._send_stream(model, reply)
+        else:
+            prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+            completion_tokens = len(reply) // 4
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        created = int(time.time())
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for word in reply.split(" "):
+            event({"content": word + " "})
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        event({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def serve_fake_openai(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, token_delay=0.0):
+    """
+    Start the fake OpenAI server on a background thread
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free one
+        latency (float): Seconds before the first token of every response
+        jitter (float): Random +/- variation added to the latency
+        token_delay (float): Seconds between streamed tokens
+
+    Returns:
+        tuple: (server, base_url) - call server.shutdown() when done
+    """
+    handler = type("ConfiguredFakeOpenAIHandler", (FakeOpenAIHandler,), {
+        "latency": latency,
+        "jitter": jitter,
+        "token_delay": token_delay,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    """Main function to parse arguments and run the server in the foreground"""
+    parser = argparse.ArgumentParser(description="Fake OpenAI Chat Completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Seconds before the first token (default: 0.5)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Random +/- latency variation in seconds (default: 0)")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between streamed tokens (default: 0)")
+    args = parser.parse_args()
+
+    server, base_url = serve_fake_openai(args.host, args.port, args.latency, args.jitter, args.token_delay)
+    print(f"Fake OpenAI server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
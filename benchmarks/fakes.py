@@ -0,0 +1,199 @@
+"""
+Deterministic local stand-ins for the OpenAI client and the PandasAI LLM.
+
+The fakes answer instantly (or after a fixed, configurable delay) with canned
+responses chosen from the request content, so benchmark numbers only reflect
+the work done by DataJar itself. Every call is recorded, including the size
+of the prompt that would have been sent, so prompt growth shows up in the
+results too.
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+import streamlit as st
+
+from pandasai.llm.fake import FakeLLM
+
+DATA_KEYWORDS = ("compare", "top", "total", "average", "trend", "chart", "plot", "show", "which", "how many")
+CHART_KEYWORDS = ("chart", "plot", "graph", "visualize", "trend")
+
+CHAT_REPLY = (
+    "Your campaigns look healthy overall. Spend is concentrated in a few campaigns, "
+    "so it is worth comparing their ROAS against the account average before scaling."
+)
+
+
+def _message(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeCompletions:
+    """Mimics `client.chat.completions` from the OpenAI SDK."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+
+    def create(self, model, messages, stream=False, **kwargs):
+        self.calls.append({
+            "model": model,
+            "prompt_chars": sum(len(m.get("content") or "") for m in messages),
+            "stream": stream,
+        })
+        if self.latency:
+            time.sleep(self.latency)
+
+        reply = fake_reply(messages)
+        if stream:
+            return (_chunk(word + " ") for word in reply.split())
+        return _message(reply)
+
+
+class FakeOpenAIClient:
+    """Drop-in replacement for `openai.OpenAI` covering the calls DataJar makes."""
+
+    def __init__(self, latency=0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency=latency))
+
+    @property
+    def calls(self):
+        return self.chat.completions.calls
+
+
+# Code returned to PandasAI. It only relies on columns of the synthetic datasets
+# and falls back to a shape summary for anything else.
+CHART_CODE = """
+import matplotlib.pyplot as plt
+df = dfs[0]
+if "campaign_name" in df.columns and "spend" in df.columns:
+    summary = df.groupby("campaign_name")["spend"].sum().nlargest(10)
+else:
+    summary = df.select_dtypes("number").iloc[:, 0].head(10)
+summary.plot(kind="bar")
+plt.savefig("temp_chart.png")
+result = {"type": "plot", "value": "temp_chart.png"}
+"""
+
+TABLE_CODE = """
+df = dfs[0]
+if "campaign_name" in df.columns and "roas" in df.columns:
+    table = df.groupby("campaign_name")[["spend", "revenue", "roas"]].mean().nlargest(10, "roas").reset_index()
+else:
+    table = df.head(10)
+result = {"type": "dataframe", "value": table}
+"""
+
+TEXT_CODE = """
+df = dfs[0]
+result = {"type": "string", "value": f"The dataset has {df.shape[0]} rows and {df.shape[1]} columns."}
+"""
+
+
+def fake_pandasai_code(query):
+    """
+    Pick the canned PandasAI code for a user query
+
+    Args:
+        query (str): The instruction PandasAI was asked to answer
+
+    Returns:
+        str: Python code in the format PandasAI expects from its LLM
+    """
+    query = query.lower()
+    if any(k in query for k in CHART_KEYWORDS):
+        return CHART_CODE
+    if "highest" in query or "top" in query:
+        return TABLE_CODE
+    return TEXT_CODE
+
+
+def fake_reply(messages):
+    """
+    Build the deterministic reply for a chat completion request
+
+    Recognizes the prompts DataJar sends (classification, PandasAI instruction
+    generation, PandasAI code generation) and answers each like the real model would.
+
+    Args:
+        messages (list): Chat completion messages, as sent to the OpenAI API
+
+    Returns:
+        str: Reply content
+    """
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    question = messages[-1]["content"] or ""
+
+    if "classification assistant" in system:
+        return "data_analysis" if any(k in question.lower() for k in DATA_KEYWORDS) else "chat"
+    if "pandas-based agent" in system:
+        if any(k in question.lower() for k in CHART_KEYWORDS):
+            return "Plot a bar chart of total spend for the top 10 campaigns."
+        return "Show the campaign with the highest ROAS."
+    if "dfs[" in question or "<dataframe" in question:
+        # PandasAI code generation prompt: the user query follows the QUERY marker
+        query = question.split("### QUERY")[-1]
+        return fake_pandasai_code(query)
+    return CHAT_REPLY
+
+
+class FakePandasAILLM(FakeLLM):
+    """PandasAI LLM that returns canned analysis code instead of calling OpenAI."""
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = []
+
+    def call(self, instruction, context=None):
+        prompt = instruction.to_string()
+        self.called = True
+        self.last_prompt = prompt
+        self.calls.append({"prompt_chars": len(prompt)})
+        if self.latency:
+            time.sleep(self.latency)
+
+        return fake_pandasai_code(self._last_query(context, prompt))
+
+    @staticmethod
+    def _last_query(context, prompt):
+        """Return the user's latest query, falling back to the full prompt."""
+        memory = getattr(context, "memory", None)
+        if memory is not None:
+            try:
+                return memory.get_last_message()
+            except Exception:
+                pass
+        return prompt
+
+
+def install_fakes(latency=0.0):
+    """
+    Import the DataJar handlers with the OpenAI and PandasAI LLMs replaced by fakes
+
+    Must be called before anything else imports `openai_handler` or `pandasai_handler`,
+    because both read `st.secrets` at import time.
+
+    Args:
+        latency (float): Seconds each fake LLM call sleeps before answering
+
+    Returns:
+        tuple: (FakeOpenAIClient, FakePandasAILLM) so callers can inspect recorded calls
+    """
+    if "openai_handler" in sys.modules or "pandasai_handler" in sys.modules:
+        raise RuntimeError("install_fakes() must run before the handlers are imported")
+
+    st.secrets = {"OPENAI_API_KEY": "sk-benchmark-fake-key"}
+
+    import openai_handler
+    import pandasai_handler
+
+    client = FakeOpenAIClient(latency=latency)
+    llm = FakePandasAILLM(latency=latency)
+    openai_handler.client = client
+    pandasai_handler.llm = llm
+    return client, llm
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Load test - replays recorded chat sessions with many concurrent simulated users
+
+Every simulated user drives its own copy of streamlit_app.py through Streamlit's
+app-testing interface (AppTest), all inside this one process, the same way a
+Streamlit server runs one script thread per browser session. OpenAI traffic goes
+to a local fake server with configurable latency.
+
+Record sessions by running the app with DATAJAR_RECORD_SESSIONS set (see
+session_recorder.py), then e.g. from the project root:
+    python -m benchmarks.load_test recordings/sessions.jsonl --users 20 --latency 0.8 --datasets-dir exports/
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import traceback
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "streamlit_app.py")
+FAKE_API_KEY = "sk-loadtest-fake-key"
+
+
+def percentile(values, pct):
+    """
+    Linear-interpolated percentile of a list of numbers
+
+    Args:
+        values (list): Sample values
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float or None: The percentile, or None for an empty sample
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def deep_size(obj, seen=None):
+    """
+    Approximate memory held by a session state value, in bytes
+
+    DataFrames are measured with memory_usage(deep=True); containers are walked
+    recursively; everything else counts its shallow size.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def session_footprint(at):
+    """Approximate bytes held in one simulated user's session state."""
+    seen = set()
+    return sum(deep_size(at.session_state[key], seen) for key in list(at.session_state))
+
+
+class DatasetCache:
+    """Loads each recorded dataset once and shares it between simulated users."""
+
+    def __init__(self, datasets_dir=None, synthetic_rows=10_000):
+        self.datasets_dir = datasets_dir
+        self.synthetic_rows = synthetic_rows
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            if name not in self._frames:
+                self._frames[name] = self._load(name)
+            return self._frames[name]
+
+    def _load(self, name):
+        path = os.path.join(self.datasets_dir, name) if self.datasets_dir else None
+        if path and os.path.exists(path):
+            return pd.read_csv(path)
+        # Recorded file isn't available here: stand in a synthetic export
+        from benchmarks.synthetic_data import generate_campaign_dataset
+        return generate_campaign_dataset(self.synthetic_rows, seed=zlib.crc32(name.encode()) % 10_000)
+
+
+def new_app(timeout):
+    """Create and run a fresh simulated browser session of the chat page."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["OPENAI_API_KEY"] = FAKE_API_KEY
+    at.run()
+    return at
+
+
+def activate_dataset(at, name, datasets):
+    """Make a dataset active in a simulated session, as project setup would."""
+    from pandasai_handler import initialize_smart_df
+
+    df = datasets.get(name)
+    at.session_state["df"] = df
+    at.session_state["sdf"] = initialize_smart_df(df)
+    at.session_state["csv_filename"] = name
+
+
+def replay_session(user_id, turns, datasets, timeout):
+    """
+    Replay one recorded session as a simulated user
+
+    Returns:
+        dict: Per-turn latencies, errors and session memory before/after
+    """
+    outcome = {"user": user_id, "latencies": [], "errors": [], "footprint_start": None, "footprint_end": None}
+    try:
+        at = new_app(timeout)
+        outcome["footprint_start"] = session_footprint(at)
+        active = None
+        for turn in turns:
+            if turn.get("dataset") and turn["dataset"] != active:
+                activate_dataset(at, turn["dataset"], datasets)
+                active = turn["dataset"]
+
+            start = time.perf_counter()
+            at.chat_input[0].set_value(turn["prompt"]).run()
+            outcome["latencies"].append(time.perf_counter() - start)
+            if at.exception:
+                outcome["errors"].append(at.exception[0].value)
+        outcome["footprint_end"] = session_footprint(at)
+    except Exception:
+        outcome["errors"].append(traceback.format_exc(limit=3))
+    return outcome
+
+
+def summarize(outcomes, wall_time):
+    """Aggregate per-user outcomes into the load test report."""
+    latencies = [lat for o in outcomes for lat in o["latencies"]]
+    growth = [
+        o["footprint_end"] - o["footprint_start"]
+        for o in outcomes
+        if o["footprint_start"] is not None and o["footprint_end"] is not None
+    ]
+    return {
+        "users": len(outcomes),
+        "turns": len(latencies),
+        "errors": sum(len(o["errors"]) for o in outcomes),
+        "wall_time_s": wall_time,
+        "throughput_turns_per_s": len(latencies) / wall_time if wall_time > 0 else None,
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.mean(latencies) if latencies else None,
+            "max": max(latencies) if latencies else None,
+        },
+        "session_memory_growth_bytes": {
+            "mean": statistics.mean(growth) if growth else None,
+            "max": max(growth) if growth else None,
+        },
+        # ru_maxrss is reported in kilobytes on Linux
+        "process_peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "sample_errors": [e for o in outcomes for e in o["errors"]][:5],
+    }
+
+
+def main():
+    """Main function to parse arguments and run the load test"""
+    parser = argparse.ArgumentParser(description="DataJar multi-user load test")
+    parser.add_argument("recording", help="JSONL file written with DATAJAR_RECORD_SESSIONS")
+    parser.add_argument("--users", type=int, default=10,
+                        help="Number of concurrent simulated users (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Fake OpenAI time to first token in seconds (default: 0.5)")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="Random +/- latency variation in seconds (default: 0.1)")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between streamed tokens (default: 0)")
+    parser.add_argument("--datasets-dir",
+                        help="Folder holding the recorded datasets; missing ones are replaced by synthetic data")
+    parser.add_argument("--synthetic-rows", type=int, default=10_000,
+                        help="Rows of synthetic data used for missing datasets (default: 10000)")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds allowed for a single turn (default: 120)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Replayed turns must not be recorded again, and simulated users must not be saved to
+    # the real session store (nor have SQLite writes counted in turn latencies)
+    os.environ.pop("DATAJAR_RECORD_SESSIONS", None)
+    os.environ["DATAJAR_SESSION_STORE"] = "memory://"
+    sys.path.insert(0, REPO_ROOT)
+    from benchmarks.fake_openai_server import serve_fake_openai
+    from session_recorder import load_recorded_sessions
+
+    sessions = load_recorded_sessions(args.recording)
+    if not sessions:
+        print("No recorded sessions found.")
+        sys.exit(1)
+
+    server, base_url = serve_fake_openai(latency=args.latency, jitter=args.jitter, token_delay=args.token_delay)
+    # Both the OpenAI SDK and PandasAI's OpenAI LLM read their endpoint from the environment
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_BASE"] = base_url
+
+    # Import the app modules once up front so simulated users don't race on first import
+    new_app(args.timeout)
+
+    datasets = DatasetCache(args.datasets_dir, args.synthetic_rows)
+    print(f"Replaying {len(sessions)} recorded session(s) with {args.users} concurrent user(s) against {base_url}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [
+            pool.submit(replay_session, user_id, sessions[user_id % len(sessions)], datasets, args.timeout)
+            for user_id in range(args.users)
+        ]
+        outcomes = [f.result() for f in futures]
+    wall_time = time.perf_counter() - start
+    server.shutdown()
+
+    report = summarize(outcomes, wall_time)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner - times the DataJar data pipeline offline and compares against a baseline
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks                       # quick run: 10k/100k rows
+    python -m benchmarks.run_benchmarks --sizes 10k,1m,10m --widths narrow,wide,very_wide
+    python -m benchmarks.run_benchmarks --save-baseline       # record benchmarks/baselines/default.json
+    python -m benchmarks.run_benchmarks --baseline default    # fail if anything regressed
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Skip dataset shapes above this many cells unless explicitly raised
+DEFAULT_MAX_CELLS = 200_000_000
+
+QUESTIONS = {
+    "text": "How many rows and columns does the dataset have?",
+    "table": "Which campaigns have the highest ROAS?",
+    "chart": "Plot a chart of total spend for the top campaigns",
+}
+
+
+def measure(fn, repeat=5, warmup=1):
+    """
+    Time a callable several times
+
+    Args:
+        fn (callable): Function to time, called without arguments
+        repeat (int): Number of timed rounds
+        warmup (int): Number of untimed rounds run first
+
+    Returns:
+        dict: min/median/mean seconds and the number of rounds
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.mean(timings),
+        "rounds": repeat,
+    }
+
+
+def _last_prompt_chars(calls):
+    return calls[-1]["prompt_chars"] if calls else None
+
+
+def measure_csv_ingest(df, repeat):
+    """Time parsing the dataset from CSV; the CSV bytes are freed when this returns."""
+    from benchmarks.synthetic_data import dataset_to_csv_bytes
+    from project_setup.upload_pipeline import read_csv_file
+
+    csv_bytes = dataset_to_csv_bytes(df)
+    stats = measure(lambda: read_csv_file(io.BytesIO(csv_bytes)), repeat)
+    stats["csv_bytes"] = len(csv_bytes)
+    return stats
+
+
+def run_dataset_cases(size_name, width_name, repeat, client, llm, results):
+    """Run every dataset-bound benchmark for one dataset shape."""
+    from benchmarks.synthetic_data import SIZES, WIDTHS, generate_campaign_dataset
+    from openai_handler import analyze_dataframe, classify_user_prompt, generate_pandasai_instruction
+    from pandasai_handler import initialize_smart_df, ask_pandasai
+
+    df = generate_campaign_dataset(SIZES[size_name], extra_columns=WIDTHS[width_name])
+    shape = f"{size_name}-{width_name}"
+    print(f"\n== {shape}: {df.shape[0]} rows x {df.shape[1]} columns")
+
+    def record(name, stats, **extra):
+        stats.update(extra)
+        results[f"{name}[{shape}]"] = stats
+        print(f"  {name:<32} median {stats['median_s'] * 1000:10.2f} ms  min {stats['min_s'] * 1000:10.2f} ms")
+
+    record("csv_ingest", measure_csv_ingest(df, repeat))
+
+    record("analyze_dataframe", measure(lambda: analyze_dataframe(df), repeat))
+
+    record("classify_user_prompt", measure(lambda: classify_user_prompt(QUESTIONS["table"], df=df), repeat),
+           prompt_chars=_last_prompt_chars(client.calls))
+
+    record("generate_pandasai_instruction",
+           measure(lambda: generate_pandasai_instruction(QUESTIONS["table"], df), repeat),
+           prompt_chars=_last_prompt_chars(client.calls))
+
+    record("initialize_smart_df", measure(lambda: initialize_smart_df(df), repeat))
+
+    sdf = initialize_smart_df(df)
+    for kind, question in QUESTIONS.items():
+        outcome = {}
+
+        def ask():
+            outcome["result"] = ask_pandasai(sdf, question)
+
+        stats = measure(ask, repeat)
+        result_type = outcome["result"]["type"]
+        if result_type == "error":
+            print(f"  ask_pandasai[{kind}] returned an error: {outcome['result']['response']}")
+        record(f"ask_pandasai_{kind}", stats, result_type=result_type,
+               prompt_chars=_last_prompt_chars(llm.calls))
+
+
+def run_chart_cases(repeat, results):
+    """Time chart rotation and lookup with a full charts folder."""
+    import pandasai_handler
+
+    print("\n== chart handling")
+    png_bytes = b"\x89PNG\r\n\x1a\n" + b"\x00" * 20_000
+    for existing in (30, 300):
+        img_dir = tempfile.mkdtemp(prefix="datajar-charts-")
+        original_dir = pandasai_handler.IMG_DIR
+        pandasai_handler.IMG_DIR = img_dir
+        try:
+            def refill():
+                for i in range(existing + 1 - len(glob.glob(os.path.join(img_dir, "*.png")))):
+                    with open(os.path.join(img_dir, f"chart_{time.time_ns()}_{i}.png"), "wb") as f:
+                        f.write(png_bytes)
+
+            def handle_chart():
+                refill()
+                pandasai_handler._rotate_old_charts()
+                pandasai_handler.get_latest_chart(since_timestamp=0)
+
+            stats = measure(handle_chart, repeat)
+        finally:
+            pandasai_handler.IMG_DIR = original_dir
+        results[f"chart_handling[{existing}]"] = stats
+        print(f"  {'chart_handling[' + str(existing) + ']':<32} median {stats['median_s'] * 1000:10.2f} ms")
+
+
+def compare_results(current, baseline, tolerance):
+    """
+    Compare benchmark results against a baseline
+
+    Args:
+        current (dict): Results of this run, keyed by case name
+        baseline (dict): Results of the baseline run, keyed by case name
+        tolerance (float): Allowed slowdown as a fraction (0.2 = 20% slower)
+
+    Returns:
+        list: (case, baseline_median, current_median, ratio) for every regressed case
+    """
+    regressions = []
+    for case, stats in current.items():
+        if case not in baseline:
+            continue
+        before = baseline[case]["median_s"]
+        after = stats["median_s"]
+        ratio = after / before if before > 0 else float("inf")
+        if ratio > 1 + tolerance:
+            regressions.append((case, before, after, ratio))
+    return regressions
+
+
+def _baseline_path(name):
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def main():
+    """Main function to parse arguments and run the benchmarks"""
+    parser = argparse.ArgumentParser(description="DataJar offline benchmarks")
+    parser.add_argument("--sizes", default="10k,100k",
+                        help="Comma-separated row presets: 10k, 100k, 1m, 10m (default: 10k,100k)")
+    parser.add_argument("--widths", default="narrow,wide",
+                        help="Comma-separated width presets: narrow, wide, very_wide (default: narrow,wide)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed rounds per case (default: 5)")
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS,
+                        help="Skip dataset shapes with more cells than this")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds each fake LLM call sleeps (default: 0)")
+    parser.add_argument("--baseline", help="Baseline name or path to compare against")
+    parser.add_argument("--save-baseline", nargs="?", const="default",
+                        help="Save this run as a baseline (default name: default)")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown before a case counts as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    # Run inside a scratch directory so charts, PandasAI caches and logs don't touch the project
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(tempfile.mkdtemp(prefix="datajar-bench-"))
+
+    from benchmarks.fakes import install_fakes
+    from benchmarks.synthetic_data import SIZES, WIDTHS, generate_campaign_dataset
+
+    client, llm = install_fakes(latency=args.latency)
+
+    results = {}
+    for size_name in args.sizes.split(","):
+        for width_name in args.widths.split(","):
+            cells = SIZES[size_name] * (len(generate_campaign_dataset(1).columns) + WIDTHS[width_name])
+            if cells > args.max_cells:
+                print(f"\n== {size_name}-{width_name}: skipped ({cells} cells > --max-cells {args.max_cells})")
+                continue
+            run_dataset_cases(size_name, width_name, args.repeat, client, llm, results)
+    run_chart_cases(args.repeat, results)
+
+    import pandas as pd
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(RESULTS_DIR, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {results_path}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        baseline_path = _baseline_path(args.save_baseline)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+
+    if args.baseline:
+        with open(_baseline_path(args.baseline)) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%} tolerance:")
+            for case, before, after, ratio in regressions:
+                print(f"  {case:<48} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  ({ratio:.2f}x)")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
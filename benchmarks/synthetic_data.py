@@ -0,0 +1,111 @@
+"""
+Synthetic marketing datasets for benchmarking.
+
+Generates ad/campaign exports that look like what users upload: a date, a
+handful of campaign dimensions, the usual delivery/performance metrics and
+optionally many extra columns to simulate very wide exports.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+# Row count presets accepted on the command line
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# Number of extra columns added on top of the base schema
+WIDTHS = {
+    "narrow": 0,
+    "wide": 50,
+    "very_wide": 300,
+}
+
+PLATFORMS = ["facebook", "instagram", "google", "tiktok", "linkedin"]
+REGIONS = ["north_america", "europe", "mena", "latam", "apac"]
+OBJECTIVES = ["awareness", "traffic", "conversions", "app_installs", "leads"]
+
+
+def _campaign_names(rng, count):
+    """Build campaign names of uneven length, like real exports."""
+    adjectives = ["Spring", "Summer", "Black Friday", "Evergreen", "Retargeting", "Launch"]
+    return [
+        f"{adjectives[i % len(adjectives)]} Campaign {i:04d}" + (" - " + "x" * int(rng.integers(0, 40)))
+        for i in range(count)
+    ]
+
+
+def generate_campaign_dataset(rows, extra_columns=0, seed=42, campaigns=200, days=365):
+    """
+    Generate a synthetic ad/campaign performance dataset
+
+    Args:
+        rows (int): Number of rows to generate
+        extra_columns (int): Number of additional columns to append (wide exports)
+        seed (int): Random seed, so every run produces the same data
+        campaigns (int): Number of distinct campaigns
+        days (int): Number of distinct days covered by the dataset
+
+    Returns:
+        pandas.DataFrame: Synthetic dataset
+    """
+    rng = np.random.default_rng(seed)
+
+    campaign_names = np.array(_campaign_names(rng, campaigns), dtype=object)
+    campaign_idx = rng.integers(0, campaigns, rows)
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+
+    impressions = rng.integers(100, 200_000, rows)
+    clicks = (impressions * rng.uniform(0.002, 0.05, rows)).astype(np.int64)
+    spend = np.round(clicks * rng.uniform(0.1, 3.0, rows), 2)
+    conversions = (clicks * rng.uniform(0.0, 0.1, rows)).astype(np.int64)
+    revenue = np.round(conversions * rng.uniform(5.0, 120.0, rows), 2)
+
+    df = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "campaign_name": campaign_names[campaign_idx],
+        "ad_set": np.char.add("adset_", (campaign_idx * 10 + rng.integers(0, 10, rows)).astype(str)),
+        "platform": np.array(PLATFORMS, dtype=object)[rng.integers(0, len(PLATFORMS), rows)],
+        "region": np.array(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), rows)],
+        "objective": np.array(OBJECTIVES, dtype=object)[campaign_idx % len(OBJECTIVES)],
+        "impressions": impressions,
+        "clicks": clicks,
+        "spend": spend,
+        "conversions": conversions,
+        "revenue": revenue,
+    })
+    df["ctr"] = np.round(df["clicks"] / df["impressions"] * 100, 3)
+    df["roas"] = np.round(np.divide(revenue, spend, out=np.zeros(rows), where=spend > 0), 3)
+
+    # Sprinkle some missing values so the missing-data analysis has work to do
+    df["conversions"] = df["conversions"].where(rng.random(rows) >= 0.01)
+
+    # Extra columns: mostly numeric metrics, every fifth one free text
+    for i in range(extra_columns):
+        if i % 5 == 4:
+            df[f"note_{i}"] = np.array(
+                ["lorem ipsum " * int(n) for n in range(8)], dtype=object
+            )[rng.integers(0, 8, rows)]
+        else:
+            df[f"metric_{i}"] = np.round(rng.normal(100, 25, rows), 3)
+
+    return df
+
+
+def dataset_to_csv_bytes(df):
+    """
+    Serialize a dataset to CSV bytes, as a browser upload would deliver it
+
+    Args:
+        df (pandas.DataFrame): Dataset to serialize
+
+    Returns:
+        bytes: CSV-encoded dataset
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
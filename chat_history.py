@@ -0,0 +1,97 @@
+import os
+import streamlit as st
+
+# Number of most recent messages rendered on every rerun
+HISTORY_WINDOW = 10
+
+# Maximum number of chart images kept in memory across reruns
+CHART_CACHE_ENTRIES = 64
+
+@st.cache_resource(max_entries=CHART_CACHE_ENTRIES, show_spinner=False)
+def _read_chart_bytes(chart_path, modified_time):
+    """Read a chart file once per (path, modification time) and keep the bytes in memory."""
+    with open(chart_path, "rb") as f:
+        return f.read()
+
+def load_chart_bytes(chart_path):
+    """
+    Get the PNG bytes of a saved chart, from memory when it was already rendered
+
+    Args:
+        chart_path (str): Path to the chart image
+
+    Returns:
+        bytes or None: Image bytes, or None if the chart file no longer exists
+    """
+    try:
+        modified_time = os.path.getmtime(chart_path)
+    except OSError:
+        return None
+    try:
+        return _read_chart_bytes(chart_path, modified_time)
+    except OSError:
+        return None
+
+def pandas_result_to_message(pandas_result):
+    """
+    Convert an ask_pandasai result into the assistant message saved in the chat history
+
+    Args:
+        pandas_result (dict): Result with "type", "response" and optionally "filepath"
+
+    Returns:
+        dict: Chat message with role, content and an optional chart_path
+    """
+    if pandas_result["type"] == "dataframe":
+        return {"role": "assistant", "content": "Here's the requested data analysis result."}
+    if pandas_result["type"] == "error":
+        return {"role": "assistant", "content": f"Error: {pandas_result['response']}"}
+    message = {"role": "assistant", "content": str(pandas_result["response"])}
+    if pandas_result["type"] == "plot" and pandas_result.get("filepath"):
+        message["chart_path"] = pandas_result["filepath"]
+    return message
+
+def reset_history_window():
+    """Collapse the history back to the most recent messages."""
+    st.session_state["history_window"] = HISTORY_WINDOW
+
+def _render_message(message):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        # Display chart if the message contains a chart path
+        if message.get("chart_path"):
+            chart_bytes = load_chart_bytes(message["chart_path"])
+            if chart_bytes:
+                st.image(chart_bytes, use_column_width=True)
+            else:
+                st.caption("📊 Chart no longer available")
+        if message.get("approximate"):
+            st.caption(f"{message['approximate']} Exact answer still computing...")
+
+def render_chat_history(messages):
+    """
+    Render the chat history, showing only the most recent window of messages
+
+    Older messages stay collapsed behind a "show earlier" button, so the cost of
+    a rerun depends on the window size and not on the length of the conversation.
+
+    Args:
+        messages (list): Chat messages from st.session_state.messages
+    """
+    if "history_window" not in st.session_state:
+        reset_history_window()
+
+    window = st.session_state["history_window"]
+    hidden = max(len(messages) - window, 0)
+
+    if hidden:
+        col_info, col_button = st.columns([3, 1])
+        with col_info:
+            st.caption(f"🗂️ {hidden} earlier message{'s' if hidden != 1 else ''} hidden")
+        with col_button:
+            if st.button(f"Show {min(HISTORY_WINDOW, hidden)} more", key="history_show_more"):
+                st.session_state["history_window"] = window + HISTORY_WINDOW
+                st.rerun()
+
+    for message in messages[hidden:]:
+        _render_message(message)
@@ -0,0 +1,11 @@
+"""
+Test setup shared by everything under tests/
+
+Living at the repository root, this file also puts the root on sys.path, so the
+app modules import the same way under `pytest` and `python -m pytest`.
+"""
+import streamlit as st
+
+# openai_handler and pandasai_handler read st.secrets at import time; tests must
+# never need (or use) a real key, so give them a fake one as benchmarks/fakes.py does
+st.secrets = {"OPENAI_API_KEY": "sk-test-fake-key"}
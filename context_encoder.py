@@ -0,0 +1,147 @@
+import math
+import re
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _encoding = None
+
+# Longest value (category, cell) written into the context before truncation
+MAX_VALUE_CHARS = 40
+
+# Number of example rows included when the budget allows it
+SAMPLE_ROWS = 2
+
+# Shortest category value that can tie a question to its column
+MIN_MATCH_CHARS = 3
+
+def count_tokens(text):
+    """
+    Count the tokens a piece of text costs in a prompt
+
+    Uses tiktoken when it is installed, otherwise estimates ~4 characters per token.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Token count
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+def _truncate(value, limit=MAX_VALUE_CHARS):
+    text = str(value).replace("\n", " ")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def _format_number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "nan"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.4g}"
+
+def _words(text):
+    return set(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+def _rank_columns(metadata, question):
+    """Order columns by relevance to the question, keeping dataset order for ties."""
+    columns = list(metadata["data_types"])
+    if not question:
+        return columns
+
+    question_words = _words(question)
+    question_text = question.lower()
+
+    def mentions(phrase):
+        # Whole words only, so a column named "ad" doesn't match "had"
+        return bool(phrase) and re.search(rf"(?<![a-z0-9]){re.escape(phrase)}(?![a-z0-9])", question_text) is not None
+
+    def score(col):
+        name = str(col).lower()
+        points = 0
+        if mentions(name) or mentions(name.replace("_", " ")):
+            points += 3
+        points += len(_words(name.replace("_", " ")) & question_words)
+        # A category value named in the question (as whole words) points at its column;
+        # empty and very short values would match almost any question
+        for value in metadata["categorical_data"].get(col, {}).get("unique_values", []):
+            value_words = _words(value)
+            if len(str(value).strip()) >= MIN_MATCH_CHARS and value_words and value_words <= question_words:
+                points += 2
+                break
+        return points
+
+    scores = {col: score(col) for col in columns}
+    return sorted(columns, key=lambda col: -scores[col])
+
+def _describe_column(col, metadata):
+    """One compact line describing a column."""
+    parts = [f"- {col}: {metadata['data_types'][col]}"]
+    if col in metadata.get("numeric_data", {}):
+        stats = metadata["numeric_data"][col]
+        parts.append(
+            f"min {_format_number(stats['min'])}, max {_format_number(stats['max'])}, "
+            f"mean {_format_number(stats['mean'])}"
+        )
+    elif col in metadata["categorical_data"]:
+        distribution = metadata["categorical_data"][col]["distribution"]
+        parts.append("top: " + ", ".join(
+            f"\"{_truncate(value)}\" {share:.0%}" for value, share in distribution.items()
+        ))
+    if col in metadata["missing_data"]:
+        parts.append(f"{metadata['missing_data'][col]['missing_percent']}% missing")
+    return " | ".join(parts)
+
+def encode_dataset_context(metadata, question=None, token_budget=800):
+    """
+    Encode dataset metadata as a compact, token-budgeted summary for a prompt
+
+    Columns relevant to the question are described first; others follow while the
+    budget lasts and are then only listed by name (or counted). Example rows are added
+    last, restricted to the described columns, with long values truncated.
+
+    Args:
+        metadata (dict): Output of analyze_dataframe / get_dataframe_metadata
+        question (str, optional): The user's question, used to pick relevant columns
+        token_budget (int): Maximum number of tokens the summary may use
+
+    Returns:
+        str: The encoded context
+    """
+    rows, cols = metadata["shape"]["rows"], metadata["shape"]["columns"]
+    lines = [f"Dataset: {rows:,} rows × {cols} columns", "Columns (name: type | summary):"]
+    used = count_tokens("\n".join(lines))
+
+    ranked = _rank_columns(metadata, question)
+    described = []
+    for col in ranked:
+        line = _describe_column(col, metadata)
+        cost = count_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        described.append(col)
+        used += cost
+
+    remaining = [col for col in ranked if col not in described]
+    if remaining:
+        names_line = "Other columns: " + ", ".join(str(col) for col in remaining)
+        if used + count_tokens(names_line) + 1 <= token_budget:
+            lines.append(names_line)
+        else:
+            lines.append(f"(+{len(remaining)} more columns not shown)")
+        used += count_tokens(lines[-1]) + 1
+
+    if described and metadata["head_rows"]:
+        sample_lines = []
+        for row in metadata["head_rows"][:SAMPLE_ROWS]:
+            sample_lines.append(", ".join(f"{col}={_truncate(row.get(col))}" for col in described))
+        block = "Example rows:\n" + "\n".join(sample_lines)
+        cost = count_tokens(block) + 1
+        if used + cost <= token_budget:
+            lines.append(block)
+
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Folder holding uploaded datasets, shared by every process that serves sessions
+DATA_DIR = os.environ.get("DATAJAR_DATA_DIR", "data")
+DATASETS_DIR = os.path.join(DATA_DIR, "datasets")
+
+# Maximum number of parsed DataFrames kept in memory per process
+MAX_LOADED_DATASETS = 8
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+def content_hash(raw_bytes):
+    """
+    Compute the content hash used to identify a dataset
+
+    Args:
+        raw_bytes (bytes): Raw file contents
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+def _dataset_path(dataset_hash):
+    return os.path.join(DATASETS_DIR, f"{dataset_hash}.csv")
+
+def parse_dataset_bytes(raw_bytes):
+    """
+    Parse raw CSV bytes into a DataFrame
+
+    Args:
+        raw_bytes (bytes): Raw CSV contents
+
+    Returns:
+        pandas.DataFrame: Parsed dataset
+    """
+    return pd.read_csv(io.BytesIO(raw_bytes))
+
+def _remember(dataset_hash, df):
+    """Keep a parsed dataset in memory, returning the copy that is kept."""
+    with _loaded_lock:
+        # Another thread may have loaded it meanwhile; keep a single copy
+        df = _loaded.setdefault(dataset_hash, df)
+        _loaded.move_to_end(dataset_hash)
+        while len(_loaded) > MAX_LOADED_DATASETS:
+            _loaded.popitem(last=False)
+    return df
+
+def save_dataset_bytes(raw_bytes, df=None):
+    """
+    Store raw CSV bytes under their content hash (no-op if already stored)
+
+    Args:
+        raw_bytes (bytes): Raw CSV contents
+        df (pandas.DataFrame, optional): The already-parsed contents, kept in memory
+            so load_dataset doesn't parse them again
+
+    Returns:
+        str: Content hash identifying the dataset
+    """
+    dataset_hash = content_hash(raw_bytes)
+    path = _dataset_path(dataset_hash)
+    if not os.path.exists(path):
+        os.makedirs(DATASETS_DIR, exist_ok=True)
+        # Write to a temp file first so other processes never see a partial dataset
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(raw_bytes)
+        os.replace(tmp_path, path)
+    if df is not None:
+        _remember(dataset_hash, df)
+    return dataset_hash
+
+def has_dataset(dataset_hash):
+    """Check whether a dataset with this content hash is stored."""
+    return os.path.exists(_dataset_path(dataset_hash))
+
+def load_dataset(dataset_hash):
+    """
+    Load a stored dataset, reusing the parsed DataFrame if this process already has it
+
+    Args:
+        dataset_hash (str): Content hash returned by save_dataset_bytes
+
+    Returns:
+        pandas.DataFrame: The dataset
+
+    Raises:
+        FileNotFoundError: If no dataset with this hash is stored
+    """
+    with _loaded_lock:
+        if dataset_hash in _loaded:
+            _loaded.move_to_end(dataset_hash)
+            return _loaded[dataset_hash]
+
+    with open(_dataset_path(dataset_hash), "rb") as f:
+        df = parse_dataset_bytes(f.read())
+    return _remember(dataset_hash, df)
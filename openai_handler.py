@@ -1,6 +1,10 @@
 import openai
-import json
+import threading
+import weakref
+from concurrent.futures import Future
+import pandas as pd
 import streamlit as st
+from context_encoder import encode_dataset_context
 
 # Get API key from Streamlit secrets
 OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
@@ -8,6 +12,18 @@ OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 # Initialize the OpenAI client
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
+# Token budget for the dataset context in each kind of prompt
+CONTEXT_TOKEN_BUDGETS = {
+    "chat": 1500,
+    "classify": 300,
+    "instruction": 800,
+}
+
+# Metadata of DataFrames that are still alive, keyed by id(df); entries are futures so
+# callers asking while the profile is being computed wait for it instead of repeating it
+_metadata_cache = {}
+_metadata_lock = threading.Lock()
+
 def get_openai_response(messages, df=None):
     """
     Send messages to OpenAI API and get a response
@@ -26,7 +42,9 @@ def get_openai_response(messages, df=None):
     
     # If DataFrame is provided, add marketing expert system message with CSV analysis
     if df is not None:
-        df_metadata = analyze_dataframe(df)
+        df_context = encode_dataset_context(
+            get_dataframe_metadata(df), _last_user_message(messages), CONTEXT_TOKEN_BUDGETS["chat"]
+        )
         system_message = {
             "role": "system",
             "content": f"""You are a senior **marketing data expert** helping a client explore and analyze their advertising and campaign dataset.
@@ -38,7 +56,7 @@ The user has uploaded a dataset. Your job is to:
 - Provide clear, actionable answers based on the context
 
 Here's what we know about the data:
-{json.dumps(df_metadata, indent=2)}
+{df_context}
 
 You should:
 - Be specific when referencing column names, categories, or missing data
@@ -80,7 +98,9 @@ def get_streaming_response(messages, df=None):
     
     # If DataFrame is provided, add marketing expert system message with CSV analysis
     if df is not None:
-        df_metadata = analyze_dataframe(df)
+        df_context = encode_dataset_context(
+            get_dataframe_metadata(df), _last_user_message(messages), CONTEXT_TOKEN_BUDGETS["chat"]
+        )
         system_message = {
             "role": "system",
             "content": f"""You are a senior **marketing data expert** helping a client explore and analyze their advertising and campaign dataset.
@@ -92,7 +112,7 @@ The user has uploaded a dataset. Your job is to:
 - Provide clear, actionable answers based on the context
 
 Here's what we know about the data:
-{json.dumps(df_metadata, indent=2)}
+{df_context}
 
 You should:
 - Be specific when referencing column names, categories, or missing data
@@ -165,8 +185,63 @@ def analyze_dataframe(df):
         }
     analysis["categorical_data"] = categorical_data
 
+    # 6. Numeric columns
+    numeric_data = {}
+    numeric = df.select_dtypes(include="number")
+    if not numeric.empty:
+        stats = numeric.agg(["min", "max", "mean"])
+        for col in numeric.columns:
+            # A nullable column (e.g. Int64) that is entirely NA has pd.NA stats
+            values = {stat: None if pd.isna(stats.at[stat, col]) else float(stats.at[stat, col])
+                      for stat in ("min", "max", "mean")}
+            if values["mean"] is not None:
+                values["mean"] = round(values["mean"], 4)
+            numeric_data[col] = values
+    analysis["numeric_data"] = numeric_data
+
     return analysis
 
+def _last_user_message(messages):
+    """Return the content of the latest user message, if any."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content")
+    return None
+
+def get_dataframe_metadata(df):
+    """
+    Get the analyze_dataframe metadata for a DataFrame, computing it only once
+    
+    The result is reused for as long as the DataFrame object is alive, so every
+    prompt built for the same dataset (in any session or worker thread) shares it.
+    A caller arriving while another thread (e.g. the warm-up) is still profiling the
+    same DataFrame waits for that computation.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame to analyze
+        
+    Returns:
+        dict: Dictionary containing metadata about the DataFrame
+    """
+    key = id(df)
+    with _metadata_lock:
+        entry = _metadata_cache.get(key)
+        owner = entry is None
+        if owner:
+            entry = _metadata_cache[key] = Future()
+            # Drop the entry once the DataFrame is garbage collected, before its id can be reused
+            weakref.finalize(df, _metadata_cache.pop, key, None)
+
+    if owner:
+        try:
+            entry.set_result(analyze_dataframe(df))
+        except Exception as e:
+            # Let the next caller try again
+            with _metadata_lock:
+                _metadata_cache.pop(key, None)
+            entry.set_exception(e)
+    return entry.result()
+
 def classify_user_prompt(prompt, df=None):
     """
     Use GPT to determine whether the prompt is a conversational or data analysis request.
@@ -179,7 +254,10 @@ def classify_user_prompt(prompt, df=None):
     Returns:
         str: 'chat' or 'data_analysis'
     """
-    dataset_info = json.dumps(analyze_dataframe(df), indent=2) if df is not None else "No dataset provided."
+    dataset_info = (
+        encode_dataset_context(get_dataframe_metadata(df), prompt, CONTEXT_TOKEN_BUDGETS["classify"])
+        if df is not None else "No dataset provided."
+    )
 
     system_msg = {
         "role": "system",
@@ -218,7 +296,9 @@ def generate_pandasai_instruction(user_question, df):
     Returns:
         str: A concise instruction formatted for PandasAI
     """
-    df_metadata = analyze_dataframe(df)
+    df_context = encode_dataset_context(
+        get_dataframe_metadata(df), user_question, CONTEXT_TOKEN_BUDGETS["instruction"]
+    )
 
     system_prompt = {
         "role": "system",
@@ -226,7 +306,7 @@ def generate_pandasai_instruction(user_question, df):
 You will be given a question about a dataset. Your job is to rewrite it into a clear, concise instruction for a pandas-based agent (PandasAI).
 
 Dataset info:
-{json.dumps(df_metadata, indent=2)}
+{df_context}
 
 Examples:
 Q: What was the best performing campaign in terms of ROAS?
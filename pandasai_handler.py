@@ -1,10 +1,14 @@
 # pandasai_handler.py
 from pandasai import SmartDataframe
+from pandasai.llm.base import LLM
 from pandasai.llm.openai import OpenAI
 import streamlit as st
 import matplotlib.pyplot as plt
 import os
 import glob
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 
 # Get API key from Streamlit secrets
@@ -16,24 +20,99 @@ llm = OpenAI(api_token=OPENAI_API_KEY)
 IMG_DIR = "imgs"
 os.makedirs(IMG_DIR, exist_ok=True)
 
-def _rotate_old_charts(max_charts=30):
+# PandasAI runs generated code, charts included, on matplotlib's global pyplot state, so
+# only one thread at a time may execute it; the lock is released while waiting on the LLM
+_execution_lock = threading.Lock()
+_execution_state = threading.local()
+
+# One lock per live SmartDataframe (keyed by id), since a SmartDataframe isn't thread-safe
+_smart_df_locks = {}
+_smart_df_locks_guard = threading.Lock()
+
+def _release_execution_lock():
+    if getattr(_execution_state, "held", False):
+        _execution_state.held = False
+        _execution_lock.release()
+
+def _acquire_execution_lock():
+    if not getattr(_execution_state, "held", False):
+        _execution_lock.acquire()
+        _execution_state.held = True
+
+@contextmanager
+def _executing():
+    """Hold the execution lock for this thread, except during LLM calls (see GuardedLLM)."""
+    _acquire_execution_lock()
+    try:
+        yield
+    finally:
+        _release_execution_lock()
+
+def _smart_df_lock(sdf):
+    key = id(sdf)
+    with _smart_df_locks_guard:
+        lock = _smart_df_locks.get(key)
+        if lock is None:
+            lock = _smart_df_locks[key] = threading.Lock()
+            # Drop the lock with the SmartDataframe, before its id can be reused
+            weakref.finalize(sdf, _smart_df_locks.pop, key, None)
+    return lock
+
+class GuardedLLM(LLM):
+    """
+    PandasAI LLM wrapper that releases the execution lock while waiting on the model
+
+    Any thread can run its LLM calls concurrently; only the code execution in between
+    is serialized by ask_pandasai. An optional hook runs before every call (one question
+    can cost several calls: code generation plus error-correction retries), e.g. a rate limiter.
+    """
+
+    def __init__(self, llm, before_call=None):
+        self.llm = llm
+        self.before_call = before_call
+
+    @property
+    def type(self):
+        return self.llm.type
+
+    @property
+    def last_prompt(self):
+        return self.llm.last_prompt
+
+    @last_prompt.setter
+    def last_prompt(self, value):
+        self.llm.last_prompt = value
+
+    def call(self, instruction, context=None):
+        held = getattr(_execution_state, "held", False)
+        _release_execution_lock()
+        try:
+            if self.before_call:
+                self.before_call()
+            return self.llm.call(instruction, context)
+        finally:
+            if held:
+                _acquire_execution_lock()
+
+def _rotate_old_charts(max_charts=30, charts_dir=None):
     """Delete older charts if the folder exceeds max_chart count."""
-    files = sorted(glob.glob(os.path.join(IMG_DIR, "*.png")), key=os.path.getctime)
+    files = sorted(glob.glob(os.path.join(charts_dir or IMG_DIR, "*.png")), key=os.path.getctime)
     while len(files) > max_charts:
         os.remove(files[0])
         files = files[1:]
 
-def get_latest_chart(since_timestamp=None):
+def get_latest_chart(since_timestamp=None, charts_dir=None):
     """
     Get the latest saved chart file.
     
     Args:
         since_timestamp (float, optional): Only return charts created after this timestamp
+        charts_dir (str, optional): Folder to look in, defaults to IMG_DIR
         
     Returns:
         str or None: Path to the latest chart file, or None if no charts found or none meet the timestamp criteria
     """
-    chart_files = glob.glob(os.path.join(IMG_DIR, "*.png"))
+    chart_files = glob.glob(os.path.join(charts_dir or IMG_DIR, "*.png"))
     if not chart_files:
         return None
         
@@ -47,12 +126,14 @@ def get_latest_chart(since_timestamp=None):
         return None
     return latest
 
-def initialize_smart_df(df):
+def initialize_smart_df(df, charts_dir=None, before_llm_call=None):
     """
     Initialize a SmartDataframe with the provided pandas DataFrame
     
     Args:
         df (pandas.DataFrame): DataFrame to convert to SmartDataframe
+        charts_dir (str, optional): Folder charts are saved to, defaults to IMG_DIR
+        before_llm_call (callable, optional): Called before each of PandasAI's LLM requests
         
     Returns:
         SmartDataframe: PandasAI SmartDataframe initialized with OpenAI LLM
@@ -60,38 +141,44 @@ def initialize_smart_df(df):
     return SmartDataframe(
         df, 
         config={
-            "llm": llm,
+            "llm": GuardedLLM(llm, before_call=before_llm_call),
             "save_charts": True,
-            "save_charts_path": IMG_DIR,
+            "save_charts_path": charts_dir or IMG_DIR,
             "verbose": True
         }
     )
 
-def ask_pandasai(sdf, instruction):
+def ask_pandasai(sdf, instruction, charts_dir=None):
     """
     Execute a PandasAI instruction on a SmartDataframe
     and return a path to a saved chart if one is generated.
+
+    Calls on the same SmartDataframe run one at a time, and generated code (which may
+    draw on pyplot's global state) runs one thread at a time across all of them.
     
     Args:
         sdf (SmartDataframe): SmartDataframe to query
         instruction (str): Instruction to execute
+        charts_dir (str, optional): Folder the SmartDataframe saves charts to, defaults to IMG_DIR
         
     Returns:
         dict: Response with type and content
     """
     try:
-        # Capture current timestamp before running the query
-        before_chat_time = datetime.now().timestamp()
-        
-        # Run PandasAI
-        result = sdf.chat(instruction)
-        print(f"[DEBUG] Result type: {type(result)} | Value: {result}")
+        with _smart_df_lock(sdf):
+            # Capture current timestamp before running the query
+            before_chat_time = datetime.now().timestamp()
 
-        # Clean up older charts
-        _rotate_old_charts()
-        
-        # Check for a chart created AFTER chat execution started
-        latest_chart = get_latest_chart(since_timestamp=before_chat_time)
+            # Run PandasAI
+            with _executing():
+                result = sdf.chat(instruction)
+            print(f"[DEBUG] Result type: {type(result)} | Value: {result}")
+
+            # Clean up older charts
+            _rotate_old_charts(charts_dir=charts_dir)
+
+            # Check for a chart created AFTER chat execution started
+            latest_chart = get_latest_chart(since_timestamp=before_chat_time, charts_dir=charts_dir)
 
         if latest_chart:
             return {
@@ -0,0 +1,217 @@
+import glob
+import math
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from chat_history import pandas_result_to_message
+from pandasai_handler import IMG_DIR, initialize_smart_df, ask_pandasai
+from warmup import CAMPAIGN_COLUMNS, DATE_COLUMNS, find_column
+
+# Datasets with at least this many rows get an approximate preview first
+PROGRESSIVE_MIN_ROWS = 1_000_000
+
+# Target number of rows in the stratified sample
+SAMPLE_ROWS = 100_000
+
+# Preview and exact charts go to a folder per run, so overlapping runs (in any session)
+# never pick up each other's chart
+PREVIEW_CHARTS_DIR = os.path.join(IMG_DIR, "preview")
+EXACT_CHARTS_DIR = os.path.join(IMG_DIR, "exact")
+
+# Run folders kept under each of the folders above; older ones are deleted
+MAX_CHART_RUNS = 30
+
+# z-score for the reported 95% margins of error
+Z_95 = 1.96
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="datajar-exact")
+
+def _new_run_dir(parent):
+    """Create a charts folder for one run, deleting the oldest runs beyond MAX_CHART_RUNS."""
+    os.makedirs(parent, exist_ok=True)
+    runs = sorted(glob.glob(os.path.join(parent, "*", "")), key=os.path.getctime)
+    for old_run in runs[:max(len(runs) - MAX_CHART_RUNS + 1, 0)]:
+        shutil.rmtree(old_run, ignore_errors=True)
+    run_dir = os.path.join(parent, uuid.uuid4().hex)
+    os.makedirs(run_dir)
+    return run_dir
+
+def use_progressive(df):
+    """Check whether a dataset is large enough to be worth an approximate preview."""
+    return len(df) >= PROGRESSIVE_MIN_ROWS
+
+def _strata(df):
+    """
+    Build the stratification keys: campaign and calendar week, when the dataset has them
+
+    Returns:
+        tuple: (list of key Series, list of human-readable stratum names)
+    """
+    keys, names = [], []
+    campaign_col = find_column(df, CAMPAIGN_COLUMNS)
+    if campaign_col:
+        keys.append(df[campaign_col])
+        names.append("campaign")
+    date_col = find_column(df, DATE_COLUMNS)
+    if date_col:
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        keys.append(dates.dt.to_period("W").astype(str).rename("week"))
+        names.append("week")
+    return keys, names
+
+def stratified_sample(df, sample_rows=SAMPLE_ROWS, seed=42):
+    """
+    Draw a proportional stratified sample (by campaign and week when available)
+
+    Every stratum is sampled at the same rate, so means, ratios and shares in the
+    sample estimate the full dataset directly; totals and counts scale by 1 / fraction.
+
+    Args:
+        df (pandas.DataFrame): Full dataset
+        sample_rows (int): Approximate number of rows to keep
+        seed (int): Random seed
+
+    Returns:
+        tuple: (sample DataFrame, sampling fraction, list of stratum names)
+    """
+    fraction = min(sample_rows / len(df), 1.0)
+    keys, names = _strata(df)
+    if not keys:
+        return df.sample(frac=fraction, random_state=seed), fraction, names
+    sample = df.groupby(keys, group_keys=False, sort=False, dropna=False).sample(frac=fraction, random_state=seed)
+    return sample, fraction, names
+
+def _mentioned_numeric_columns(df, instruction, limit=3):
+    """Numeric columns referenced in the instruction, falling back to the first few numeric columns."""
+    numeric = list(df.select_dtypes(include="number").columns)
+    text = instruction.lower()
+    mentioned = [
+        col for col in numeric
+        if str(col).lower() in text or str(col).lower().replace("_", " ") in text
+    ]
+    return (mentioned or numeric)[:limit]
+
+def estimate_errors(sample, fraction, instruction):
+    """
+    Estimate 95% margins of error for the means of the columns an instruction uses
+
+    Uses the stratified-sampling variance sum over strata of W_h^2 (1 - f) s_h^2 / n_h,
+    with stratum weights W_h taken from the (proportional) sample.
+
+    Args:
+        sample (pandas.DataFrame): Stratified sample
+        fraction (float): Sampling fraction
+        instruction (str): PandasAI instruction, used to pick the relevant columns
+
+    Returns:
+        dict: Column name -> margin of error as a percentage of the estimated mean
+    """
+    columns = _mentioned_numeric_columns(sample, instruction)
+    if not columns:
+        return {}
+
+    keys, _ = _strata(sample)
+    margins = {}
+    for col in columns:
+        if keys:
+            stats = sample.groupby(keys, sort=False, dropna=False)[col].agg(["count", "mean", "var"]).dropna(subset=["mean"])
+            weights = stats["count"] / stats["count"].sum()
+            mean = (weights * stats["mean"]).sum()
+            # Strata with a single row have no variance estimate and contribute nothing
+            variance = (weights ** 2 * (1 - fraction) * stats["var"].fillna(0) / stats["count"]).sum()
+        else:
+            values = sample[col].dropna()
+            mean = values.mean()
+            variance = (1 - fraction) * values.var() / max(len(values), 1)
+        if mean and not math.isnan(mean):
+            margins[col] = round(Z_95 * math.sqrt(variance) / abs(mean) * 100, 2)
+    return margins
+
+def run_preview(df, instruction):
+    """
+    Answer an instruction approximately on a stratified sample
+
+    Args:
+        df (pandas.DataFrame): Full dataset
+        instruction (str): PandasAI instruction
+
+    Returns:
+        dict: "result" (as from ask_pandasai), "fraction", "sample_rows", "total_rows",
+              "strata" and "margins" (column -> 95% margin in percent)
+    """
+    sample, fraction, strata = stratified_sample(df)
+    charts_dir = _new_run_dir(PREVIEW_CHARTS_DIR)
+    sample_sdf = initialize_smart_df(sample, charts_dir=charts_dir)
+
+    # Let the LLM know it's looking at a sample so totals and counts come out at full scale
+    sample_instruction = (
+        f"{instruction}\n\nNote: the data is a {fraction:.2%} stratified random sample of the full dataset. "
+        f"Multiply any totals, sums or counts by {1 / fraction:.2f} to estimate full-data values; "
+        "averages, ratios and rankings need no adjustment."
+    )
+    result = ask_pandasai(sample_sdf, sample_instruction, charts_dir=charts_dir)
+    return {
+        "result": result,
+        "fraction": fraction,
+        "sample_rows": len(sample),
+        "total_rows": len(df),
+        "strata": strata,
+        "margins": estimate_errors(sample, fraction, instruction),
+    }
+
+def describe_preview(preview):
+    """Build the caption shown under an approximate answer."""
+    by = f", by {' and '.join(preview['strata'])}" if preview["strata"] else ""
+    caption = (
+        f"≈ Estimated from a {preview['fraction']:.1%} stratified sample "
+        f"({preview['sample_rows']:,} of {preview['total_rows']:,} rows{by})."
+    )
+    if preview["margins"]:
+        margins = ", ".join(f"{col} ±{margin}%" for col, margin in preview["margins"].items())
+        caption += f" 95% margin on means: {margins}."
+    return caption
+
+def _run_exact(df, instruction):
+    charts_dir = _new_run_dir(EXACT_CHARTS_DIR)
+    # A SmartDataframe of its own (cheap to build) so the run saves charts only to its folder
+    sdf = initialize_smart_df(df, charts_dir=charts_dir)
+    return ask_pandasai(sdf, instruction, charts_dir=charts_dir)
+
+def start_exact_analysis(df, instruction):
+    """
+    Run the full-data analysis on a background thread, with its own charts folder
+
+    Args:
+        df (pandas.DataFrame): Full dataset
+        instruction (str): PandasAI instruction
+
+    Returns:
+        concurrent.futures.Future: Resolves to the ask_pandasai result
+    """
+    return _executor.submit(_run_exact, df, instruction)
+
+def resolve_pending_exact(session_state):
+    """
+    Replace approximate chat messages whose exact analysis has finished
+
+    Args:
+        session_state: Streamlit session state holding "messages" and "pending_exact"
+
+    Returns:
+        int: Number of messages still waiting for their exact answer
+    """
+    pending = session_state.get("pending_exact", {})
+    for index, future in list(pending.items()):
+        if not future.done():
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"type": "error", "response": str(e)}
+        session_state["messages"][index] = pandas_result_to_message(result)
+        del pending[index]
+    return len(pending)
@@ -1,7 +1,52 @@
 import streamlit as st
 import os
-import pandas as pd
-from pandasai_handler import initialize_smart_df
+from datetime import date, timedelta
+from warmup import start_warmup
+from project_setup.upload_pipeline import read_csv_file, process_uploads
+from session_persistence import load_entry_df, entry_shape
+
+# Days of Facebook Page insights pulled on connect
+FACEBOOK_DAYS = 90
+
+def activate_file(file_entry):
+    """
+    Make a loaded file the active dataset and start warming it up in the background
+    
+    Args:
+        file_entry (dict): Entry from st.session_state["csv_files"]
+    """
+    df = load_entry_df(file_entry)
+    st.session_state["df"] = df
+    st.session_state["csv_filename"] = file_entry["name"]
+    # The SmartDataframe is built by the warm-up; drop the previous dataset's one
+    st.session_state.pop("sdf", None)
+    st.session_state["warmup"] = start_warmup(df)
+
+def ensure_active_dataset():
+    """
+    Load the active dataset of a restored session if it isn't loaded yet
+
+    Restored sessions only know the active file's name; its data is read from the
+    dataset store (and warmed up) the first time it's needed.
+    """
+    if "df" in st.session_state or "csv_filename" not in st.session_state:
+        return
+    name = st.session_state["csv_filename"]
+    file_entry = next((f for f in st.session_state.get("csv_files", []) if f["name"] == name), None)
+    if file_entry is None:
+        clear_active_file()
+        return
+    try:
+        activate_file(file_entry)
+    except Exception as e:
+        print(f"[Sessions] Could not load dataset {name}: {e}")
+        clear_active_file()
+
+def clear_active_file():
+    """Forget the active dataset."""
+    for key in ("df", "sdf", "csv_filename", "warmup"):
+        if key in st.session_state:
+            del st.session_state[key]
 
 def load_project_setup():
     # Load styling
@@ -31,26 +76,45 @@ def load_project_setup():
         
         if st.button("Connect", key="facebook_connect"):
             try:
-                # Check if the Facebook sample is already in the list
-                if not any(f["name"] == "facebook_page_sample.csv" for f in st.session_state["csv_files"]):
-                    # Path to Facebook sample data
-                    facebook_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                               "FacebookConnect", "facebook_page_sample.csv")
-                    # Load the data
-                    df = pd.read_csv(facebook_path)
-                    # Add to our list of CSV files
-                    st.session_state["csv_files"].append({
-                        "name": "facebook_page_sample.csv",
-                        "df": df
-                    })
-                    
-                    # Set as active DataFrame if it's our first file
-                    if len(st.session_state["csv_files"]) == 1:
-                        st.session_state["df"] = df
-                        st.session_state["sdf"] = initialize_smart_df(df)
-                        st.session_state["csv_filename"] = "facebook_page_sample.csv"
+                # Import the Facebook insights module
+                from FacebookConnect.facebook_insights import get_facebook_credentials, fetch_page_insights
+                
+                credentials = get_facebook_credentials()
+                connected = bool(credentials["access_token"] and credentials["page_id"])
+                # Without credentials, fall back to the bundled sample data
+                file_name = "facebook_page_insights.csv" if connected else "facebook_page_sample.csv"
+                
+                # Check if the Facebook data is already in the list
+                if not any(f["name"] == file_name for f in st.session_state["csv_files"]):
+                    if connected:
+                        # Fetch the last 90 days (cached months are not fetched again)
+                        with st.spinner("Fetching Facebook Page insights..."):
+                            today = date.today()
+                            df = fetch_page_insights(credentials["page_id"], credentials["access_token"],
+                                                     today - timedelta(days=FACEBOOK_DAYS), today,
+                                                     graph_url=credentials["graph_url"])
+                    else:
+                        # Path to Facebook sample data
+                        facebook_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
+                                                   "FacebookConnect", "facebook_page_sample.csv")
+                        # Load the data
+                        df = read_csv_file(facebook_path)
                     
-                    st.success("✅ Facebook Page data loaded.")
+                    if not df.empty:
+                        # Add to our list of CSV files
+                        file_entry = {
+                            "name": file_name,
+                            "df": df
+                        }
+                        st.session_state["csv_files"].append(file_entry)
+                        
+                        # Set as active DataFrame if it's our first file
+                        if len(st.session_state["csv_files"]) == 1:
+                            activate_file(file_entry)
+                        
+                        st.success("✅ Facebook Page data loaded.")
+                    else:
+                        st.warning("⚠️ No data returned from Facebook.")
                 else:
                     st.info("📘 Facebook Page data is already loaded.")
             except Exception as e:
@@ -74,16 +138,15 @@ def load_project_setup():
                     
                     if not df.empty:
                         # Add to our list of CSV files
-                        st.session_state["csv_files"].append({
+                        file_entry = {
                             "name": "supabase_data.csv",
                             "df": df
-                        })
+                        }
+                        st.session_state["csv_files"].append(file_entry)
                         
                         # Set as active DataFrame if it's our first file
                         if len(st.session_state["csv_files"]) == 1:
-                            st.session_state["df"] = df
-                            st.session_state["sdf"] = initialize_smart_df(df)
-                            st.session_state["csv_filename"] = "supabase_data.csv"
+                            activate_file(file_entry)
                         
                         st.success("✅ Supabase data loaded.")
                     else:
@@ -110,30 +173,14 @@ def load_project_setup():
             key="project_multi_upload"
         )
         
-        # Process any new uploads
+        # Process any new uploads (parsed in parallel, duplicates detected by content hash)
         if uploaded_files:
-            existing_names = [f["name"] for f in st.session_state["csv_files"]]
-            for uploaded_file in uploaded_files:
-                # Check if the file is already in the list (by name)
-                if uploaded_file.name not in existing_names:
-                    try:
-                        df = pd.read_csv(uploaded_file)
-                        # Add to our list of CSV files
-                        st.session_state["csv_files"].append({
-                            "name": uploaded_file.name,
-                            "df": df
-                        })
-                        
-                        # Set as active DataFrame if it's our first or only file
-                        if len(st.session_state["csv_files"]) == 1:
-                            st.session_state["df"] = df
-                            st.session_state["sdf"] = initialize_smart_df(df)
-                            st.session_state["csv_filename"] = uploaded_file.name
-                            
-                        st.success(f"✅ Uploaded: {uploaded_file.name}")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Failed to read {uploaded_file.name}: {e}")
+            def on_added(file_entry):
+                # Set as active DataFrame if it's our first or only file
+                if len(st.session_state["csv_files"]) == 1:
+                    activate_file(file_entry)
+
+            process_uploads(uploaded_files, on_added)
 
     # Display uploaded files with card-style design
     if st.session_state["csv_files"]:
@@ -159,7 +206,8 @@ def load_project_setup():
                 
                 with col1:
                     st.markdown(f"**{file_entry['name']}**")
-                    st.caption(f"{file_entry['df'].shape[0]} rows × {file_entry['df'].shape[1]} columns")
+                    rows, columns = entry_shape(file_entry)
+                    st.caption(f"{rows} rows × {columns} columns")
                 
                 # Set as active button
                 with col2:
@@ -168,9 +216,7 @@ def load_project_setup():
                         st.success("🔍 Active")
                     else:
                         if st.button("🔍 Set Active", key=f"active_{i}"):
-                            st.session_state["df"] = file_entry["df"]
-                            st.session_state["sdf"] = initialize_smart_df(file_entry["df"])
-                            st.session_state["csv_filename"] = file_entry["name"]
+                            activate_file(file_entry)
                             st.rerun()
                     
                 # Remove button
@@ -181,18 +227,10 @@ def load_project_setup():
                             if len(st.session_state["csv_files"]) > 1:
                                 # Set another file as active
                                 next_index = 0 if i > 0 else 1
-                                next_file = st.session_state["csv_files"][next_index]
-                                st.session_state["df"] = next_file["df"]
-                                st.session_state["sdf"] = initialize_smart_df(next_file["df"])
-                                st.session_state["csv_filename"] = next_file["name"]
+                                activate_file(st.session_state["csv_files"][next_index])
                             else:
                                 # No more files, clear the active file
-                                if "df" in st.session_state:
-                                    del st.session_state["df"]
-                                if "sdf" in st.session_state:
-                                    del st.session_state["sdf"]
-                                if "csv_filename" in st.session_state:
-                                    del st.session_state["csv_filename"]
+                                clear_active_file()
                         
                         # Remove the file from the list
                         del st.session_state["csv_files"][i]
@@ -201,7 +239,7 @@ def load_project_setup():
     # Add a button to return to chat
     st.markdown("---")
     if st.button("Return to Chat"):
-        st.query_params = {"page": "chat"}
+        st.query_params["page"] = "chat"
         st.rerun()
     
     # Close the container div
@@ -0,0 +1,111 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import streamlit as st
+from dataset_store import content_hash as compute_content_hash, save_dataset_bytes
+
+# Uploaded files parsed at the same time (pandas releases the GIL while parsing)
+UPLOAD_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="datajar-upload")
+
+def read_csv_file(source):
+    """
+    Parse an uploaded or on-disk CSV file into a DataFrame
+
+    Args:
+        source (str or file-like): Path or file object (e.g. a Streamlit UploadedFile)
+
+    Returns:
+        pandas.DataFrame: Parsed CSV contents
+    """
+    return pd.read_csv(source)
+
+def _upload_key(uploaded_file):
+    """Identify an upload across reruns without reading its contents."""
+    return getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+
+def _unique_name(name, taken_names):
+    """Suffix a file name that's already used by a file with different contents."""
+    if name not in taken_names:
+        return name
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while f"{stem} ({counter}){ext}" in taken_names:
+        counter += 1
+    return f"{stem} ({counter}){ext}"
+
+def _hash_and_parse(raw_bytes, claimed_hashes, claim_lock):
+    """
+    Hash an upload and, unless a file with the same contents is already known,
+    store it in the dataset store (so the session can be restored later) and parse it
+
+    Returns:
+        tuple: (content hash, DataFrame or None for a duplicate)
+    """
+    content_hash = compute_content_hash(raw_bytes)
+    with claim_lock:
+        if content_hash in claimed_hashes:
+            return content_hash, None
+        claimed_hashes.add(content_hash)
+    df = read_csv_file(io.BytesIO(raw_bytes))
+    save_dataset_bytes(raw_bytes)
+    return content_hash, df
+
+def process_uploads(uploaded_files, on_added):
+    """
+    Parse new uploads concurrently, skipping duplicates by content hash
+
+    Shows progress per file and registers each file in st.session_state["csv_files"]
+    as soon as it's parsed.
+
+    Args:
+        uploaded_files (list): Files from st.file_uploader
+        on_added (callable): Called with each new file entry right after it's registered
+    """
+    processed = st.session_state.setdefault("processed_uploads", set())
+    new_files = [f for f in uploaded_files if _upload_key(f) not in processed]
+    if not new_files:
+        return
+
+    csv_files = st.session_state["csv_files"]
+    claimed_hashes = {f["hash"] for f in csv_files if f.get("hash")}
+    names_by_hash = {f["hash"]: f["name"] for f in csv_files if f.get("hash")}
+    taken_names = {f["name"] for f in csv_files}
+    claim_lock = threading.Lock()
+
+    progress = st.progress(0.0, text=f"Parsing {len(new_files)} file(s)...")
+    statuses = {}
+    futures = {}
+    for uploaded_file in new_files:
+        # Keyed like processed_uploads: two files in one drop may share a name
+        status = statuses[_upload_key(uploaded_file)] = st.empty()
+        status.caption(f"⏳ {uploaded_file.name}")
+        future = _executor.submit(_hash_and_parse, uploaded_file.getvalue(), claimed_hashes, claim_lock)
+        futures[future] = uploaded_file
+
+    for done, future in enumerate(as_completed(futures), start=1):
+        uploaded_file = futures[future]
+        status = statuses[_upload_key(uploaded_file)]
+        processed.add(_upload_key(uploaded_file))
+        try:
+            content_hash, df = future.result()
+        except Exception as e:
+            status.error(f"❌ Failed to read {uploaded_file.name}: {e}")
+        else:
+            if df is None:
+                duplicate_of = names_by_hash.get(content_hash, "another uploaded file")
+                status.info(f"📄 {uploaded_file.name} has the same contents as {duplicate_of}, skipped.")
+            else:
+                name = _unique_name(uploaded_file.name, taken_names)
+                taken_names.add(name)
+                names_by_hash[content_hash] = name
+                file_entry = {"name": name, "df": df, "hash": content_hash}
+                csv_files.append(file_entry)
+                on_added(file_entry)
+                status.success(f"✅ Uploaded: {name} ({df.shape[0]} rows × {df.shape[1]} columns)")
+        progress.progress(done / len(new_files), text=f"Parsed {done}/{len(new_files)} file(s)")
+    progress.empty()
@@ -0,0 +1,249 @@
+import io
+import json
+import os
+
+import pandas as pd
+import streamlit as st
+
+from dataset_store import DATA_DIR, has_dataset, load_dataset, save_dataset_bytes
+from session_store import get_session_store
+
+# Store used by the Streamlit app: a local SQLite file unless DATAJAR_SESSION_STORE says otherwise
+SESSION_STORE_URL = os.environ.get("DATAJAR_SESSION_STORE", f"sqlite:///{os.path.join(DATA_DIR, 'sessions.db')}")
+
+# Query parameter carrying the session id, so a reload or shared link resumes the conversation
+SESSION_PARAM = "sid"
+
+@st.cache_resource
+def get_store():
+    """Return the session store shared by every browser session of this process."""
+    return get_session_store(SESSION_STORE_URL)
+
+def restore_session():
+    """
+    Attach the browser session to its stored session, creating one if needed
+
+    Runs once per browser session. Only plain state is restored: the conversation and
+    references to the session's datasets. DataFrames are loaded (and SmartDataframes
+    warmed up) later, the first time they are needed.
+    """
+    if st.session_state.get("session_restored"):
+        return
+    st.session_state["session_restored"] = True
+
+    store = get_store()
+    session_id = st.query_params.get(SESSION_PARAM)
+    try:
+        stored = store.get(session_id) if session_id else None
+    except Exception as e:
+        print(f"[Sessions] Could not load session {session_id}: {e}")
+        stored = None
+
+    if stored is None:
+        session_id = store.create()
+        st.query_params[SESSION_PARAM] = session_id
+    # Also used as the session id by session_recorder
+    st.session_state["session_id"] = session_id
+    if stored is None:
+        return
+
+    # Store positions of the restored messages (appended in order, so they are 0..n-1)
+    st.session_state["persisted_positions"] = list(range(len(stored["messages"])))
+    watched = st.session_state["watched_messages"] = {}
+    for index, message in enumerate(stored["messages"]):
+        # The exact computation behind a preview didn't survive the restart; keep the preview, labelled
+        approximate = message.pop("approximate", None)
+        if approximate:
+            message["content"] += f"\n\n_{approximate}_"
+            watched[index] = None  # rewritten by the next persist_session
+    if stored["messages"]:
+        st.session_state.messages = stored["messages"]
+
+    shapes = stored.get("dataset_shapes", {})
+    csv_files = []
+    for name, dataset_hash in stored["datasets"].items():
+        if not has_dataset(dataset_hash):
+            print(f"[Sessions] Dataset {name} ({dataset_hash}) is missing from the dataset store, skipped")
+            continue
+        rows, columns = shapes.get(name, (None, None))
+        csv_files.append({"name": name, "hash": dataset_hash, "df": None, "rows": rows, "columns": columns})
+    st.session_state["csv_files"] = csv_files
+
+    if any(f["name"] == stored["active_dataset"] for f in csv_files):
+        # The DataFrame itself is loaded by ensure_active_dataset when a question needs it
+        st.session_state["csv_filename"] = stored["active_dataset"]
+
+def load_entry_df(file_entry):
+    """
+    Return a file entry's DataFrame, loading it from the dataset store on first use
+
+    Args:
+        file_entry (dict): Entry from st.session_state["csv_files"]
+
+    Returns:
+        pandas.DataFrame: The file's data
+    """
+    if file_entry.get("df") is None:
+        file_entry["df"] = load_dataset(file_entry["hash"])
+    return file_entry["df"]
+
+def entry_shape(file_entry):
+    """Return (rows, columns) of a file entry without loading its data."""
+    if file_entry.get("df") is not None:
+        return file_entry["df"].shape
+    return file_entry.get("rows"), file_entry.get("columns")
+
+def _active_entry():
+    name = st.session_state.get("csv_filename")
+    return next((f for f in st.session_state.get("csv_files", []) if f["name"] == name), None)
+
+def _fingerprint(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+def _persist_messages(store, session_id):
+    """
+    Append new messages and rewrite the few stored ones that can still change
+
+    Only messages past the high-water mark are serialized, plus watched ones: previews
+    still waiting for their exact answer (st.session_state["pending_exact"]) and restored
+    messages that were relabelled. A rerun's cost doesn't grow with the conversation.
+    """
+    messages = st.session_state.get("messages", [])
+    positions = st.session_state.setdefault("persisted_positions", [])
+    watched = st.session_state.setdefault("watched_messages", {})
+    pending = st.session_state.get("pending_exact", {})
+
+    for index in set(watched) | set(pending):
+        if index >= len(positions):
+            continue
+        fingerprint = _fingerprint(messages[index])
+        if fingerprint != watched.get(index):
+            store.update_message(session_id, positions[index], json.loads(fingerprint))
+        if index in pending:
+            watched[index] = fingerprint
+        else:
+            # Resolved: the message won't change again
+            watched.pop(index, None)
+
+    for index in range(len(positions), len(messages)):
+        fingerprint = _fingerprint(messages[index])
+        positions.append(store.append_message(session_id, json.loads(fingerprint)))
+        if index in pending:
+            watched[index] = fingerprint
+
+def persist_session():
+    """
+    Write the session's conversation and dataset references to the store
+
+    Only new or changed messages are written, so another tab on the same session
+    never loses its messages. Datasets that didn't come from an upload (Facebook,
+    Supabase) are added to the dataset store on first save. The dataset state is
+    only written when it has changed.
+    """
+    session_id = st.session_state.get("session_id")
+    if not session_id:
+        return
+    store = get_store()
+    try:
+        _persist_messages(store, session_id)
+    except Exception as e:
+        print(f"[Sessions] Could not save messages of session {session_id}: {e}")
+
+    csv_files = st.session_state.get("csv_files", [])
+    for file_entry in csv_files:
+        if not file_entry.get("hash") and file_entry.get("df") is not None:
+            file_entry["hash"] = save_dataset_bytes(file_entry["df"].to_csv(index=False).encode("utf-8"))
+
+    state = {
+        "datasets": {f["name"]: f["hash"] for f in csv_files if f.get("hash")},
+        "dataset_shapes": {f["name"]: list(entry_shape(f)) for f in csv_files},
+        "active_dataset": st.session_state.get("csv_filename"),
+    }
+    fingerprint = _fingerprint(state)
+    if fingerprint == st.session_state.get("persisted_state"):
+        return
+    try:
+        store.save(session_id, json.loads(fingerprint))
+        st.session_state["persisted_state"] = fingerprint
+    except Exception as e:
+        print(f"[Sessions] Could not save session {session_id}: {e}")
+
+def _serialize_result(result):
+    """Convert an ask_pandasai result to JSON-friendly data, or None if it shouldn't be cached."""
+    if result["type"] == "dataframe":
+        return {"type": "dataframe", "response": result["response"].to_json(orient="split", date_format="iso")}
+    if result["type"] in ("text", "plot"):
+        return dict(result)
+    return None
+
+def get_cached_analysis(instruction):
+    """
+    Look up a stored result for an instruction on the active dataset
+
+    Args:
+        instruction (str): PandasAI instruction
+
+    Returns:
+        dict or None: ask_pandasai-style result, or None if there is no usable cached result
+    """
+    file_entry = _active_entry()
+    if not file_entry or not file_entry.get("hash"):
+        return None
+    try:
+        cached = get_store().get_cached_analysis(file_entry["hash"], instruction)
+    except Exception as e:
+        print(f"[Sessions] Could not read analysis cache: {e}")
+        return None
+    if cached is None:
+        return None
+    if cached["type"] == "dataframe":
+        cached["response"] = pd.read_json(io.StringIO(cached["response"]), orient="split")
+    elif cached["type"] == "plot" and not (cached.get("filepath") and os.path.exists(cached["filepath"])):
+        # The chart has been rotated out of the charts folder; recompute it
+        return None
+    return cached
+
+def cache_analysis(instruction, result):
+    """
+    Remember a result for an instruction on the active dataset (errors are not cached)
+
+    Args:
+        instruction (str): PandasAI instruction
+        result (dict): Result from ask_pandasai
+    """
+    file_entry = _active_entry()
+    serialized = _serialize_result(result)
+    if not file_entry or not file_entry.get("hash") or serialized is None:
+        return
+    try:
+        get_store().cache_analysis(file_entry["hash"], instruction, serialized)
+    except Exception as e:
+        print(f"[Sessions] Could not write analysis cache: {e}")
+
+def cache_analysis_when_done(instruction, future):
+    """
+    Remember a background analysis result for the active dataset once it finishes
+
+    The dataset is captured now, since the user may switch datasets before the result arrives.
+
+    Args:
+        instruction (str): PandasAI instruction
+        future (concurrent.futures.Future): Resolves to an ask_pandasai result
+    """
+    file_entry = _active_entry()
+    if not file_entry or not file_entry.get("hash"):
+        return
+    dataset_hash, store = file_entry["hash"], get_store()
+
+    def on_done(done_future):
+        if done_future.exception() is not None:
+            return
+        serialized = _serialize_result(done_future.result())
+        if serialized is None:
+            return
+        try:
+            store.cache_analysis(dataset_hash, instruction, serialized)
+        except Exception as e:
+            print(f"[Sessions] Could not write analysis cache: {e}")
+
+    future.add_done_callback(on_done)
@@ -0,0 +1,76 @@
+"""
+Session recorder - appends chat turns to a JSONL file for later load-test replay
+
+Recording is off unless the DATAJAR_RECORD_SESSIONS environment variable
+points at the file to write, e.g.:
+    DATAJAR_RECORD_SESSIONS=recordings/sessions.jsonl streamlit run streamlit_app.py
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+RECORD_PATH = os.environ.get("DATAJAR_RECORD_SESSIONS")
+
+# Streamlit runs every browser session on its own thread, so serialize writes
+_write_lock = threading.Lock()
+
+def get_session_id(session_state):
+    """
+    Return a stable id for the current browser session, creating one if needed
+
+    Args:
+        session_state: Streamlit session state
+
+    Returns:
+        str: Session id
+    """
+    if "session_id" not in session_state:
+        session_state["session_id"] = uuid.uuid4().hex
+    return session_state["session_id"]
+
+def record_turn(session_state, prompt):
+    """
+    Record one user prompt together with the dataset that was active when it was asked
+
+    Args:
+        session_state: Streamlit session state
+        prompt (str): The user's message
+    """
+    if not RECORD_PATH:
+        return
+
+    event = {
+        "session_id": get_session_id(session_state),
+        "timestamp": time.time(),
+        "dataset": session_state.get("csv_filename"),
+        "prompt": prompt,
+    }
+    try:
+        record_dir = os.path.dirname(RECORD_PATH)
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+        with _write_lock, open(RECORD_PATH, "a") as f:
+            f.write(json.dumps(event) + "\n")
+    except OSError as e:
+        print(f"[Recorder] Could not record turn: {e}")
+
+def load_recorded_sessions(path):
+    """
+    Load recorded turns grouped by session, in the order they were asked
+
+    Args:
+        path (str): JSONL file written by record_turn
+
+    Returns:
+        list: One list of turn dicts per recorded session
+    """
+    sessions = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                event = json.loads(line)
+                sessions.setdefault(event["session_id"], []).append(event)
+    return [sorted(turns, key=lambda t: t["timestamp"]) for turns in sessions.values()]
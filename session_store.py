@@ -0,0 +1,255 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+# Store used when DATAJAR_SESSION_STORE isn't set
+DEFAULT_STORE_URL = "memory://"
+
+def new_session():
+    """
+    Build the state of a fresh session
+
+    Sessions only hold plain, JSON-serializable data so any store can keep them;
+    datasets are referenced by content hash (see dataset_store.py).
+
+    Returns:
+        dict: Empty session state
+    """
+    return {
+        "messages": [],
+        "datasets": {},          # file name -> content hash
+        "active_dataset": None,  # file name of the active dataset
+        "dataset_shapes": {},    # file name -> [rows, columns], so files can be listed without loading them
+    }
+
+class SessionStore:
+    """Interface for session storage backends."""
+
+    def create(self):
+        """Create a new session and return its id."""
+        session_id = uuid.uuid4().hex
+        self.save(session_id, new_session())
+        return session_id
+
+    def get(self, session_id):
+        """Return the session state, or None if the session doesn't exist."""
+        raise NotImplementedError
+
+    def save(self, session_id, session):
+        """
+        Store the session's state other than its messages
+
+        Messages are only written through append_message, so saving state read
+        earlier never drops messages appended in the meantime.
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        """Remove a session."""
+        raise NotImplementedError
+
+    def append_message(self, session_id, message):
+        """
+        Append one message to the session's conversation
+
+        Returns:
+            int: Position of the message, for update_message
+        """
+        raise NotImplementedError
+
+    def update_message(self, session_id, position, message):
+        """Replace the message at a position returned by append_message."""
+        raise NotImplementedError
+
+    def get_cached_analysis(self, dataset_hash, instruction):
+        """Return a cached analysis result for a dataset and instruction, or None."""
+        return None
+
+    def cache_analysis(self, dataset_hash, instruction, result):
+        """Remember a JSON-serializable analysis result for a dataset and instruction."""
+
+class InMemorySessionStore(SessionStore):
+    """Keeps sessions in this process only; for a single worker process or local development."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._analyses = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            # Hand out copies so callers behave the same as with external stores
+            return copy.deepcopy(session) if session is not None else None
+
+    def save(self, session_id, session):
+        state = {key: copy.deepcopy(value) for key, value in session.items() if key != "messages"}
+        with self._lock:
+            messages = self._sessions[session_id]["messages"] if session_id in self._sessions else []
+            self._sessions[session_id] = {**state, "messages": messages}
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def append_message(self, session_id, message):
+        with self._lock:
+            if session_id not in self._sessions:
+                raise KeyError(session_id)
+            messages = self._sessions[session_id]["messages"]
+            messages.append(copy.deepcopy(message))
+            return len(messages) - 1
+
+    def update_message(self, session_id, position, message):
+        with self._lock:
+            if session_id not in self._sessions:
+                raise KeyError(session_id)
+            self._sessions[session_id]["messages"][position] = copy.deepcopy(message)
+
+    def get_cached_analysis(self, dataset_hash, instruction):
+        with self._lock:
+            return copy.deepcopy(self._analyses.get((dataset_hash, instruction)))
+
+    def cache_analysis(self, dataset_hash, instruction, result):
+        with self._lock:
+            self._analyses[(dataset_hash, instruction)] = copy.deepcopy(result)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Keeps sessions in a SQLite database, shared by every process on the machine
+
+    Messages live in their own table so appending one doesn't rewrite the conversation.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                );
+                CREATE TABLE IF NOT EXISTS analyses (
+                    dataset_hash TEXT NOT NULL,
+                    instruction TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (dataset_hash, instruction)
+                );
+            """)
+
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, session_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = json.loads(row[0])
+            session["messages"] = [
+                json.loads(message) for (message,) in conn.execute(
+                    "SELECT message FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+                )
+            ]
+        return session
+
+    def save(self, session_id, session):
+        state = {key: value for key, value in session.items() if key != "messages"}
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO sessions (id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (session_id, json.dumps(state, default=str), time.time()),
+            )
+
+    def delete(self, session_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def append_message(self, session_id, message):
+        with closing(self._connect()) as conn, conn:
+            if conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+                raise KeyError(session_id)
+            # A single statement, so concurrent appends from other processes can't take the same position
+            rowid = conn.execute(
+                "INSERT INTO messages (session_id, seq, message) "
+                "SELECT ?, COALESCE(MAX(seq) + 1, 0), ? FROM messages WHERE session_id = ?",
+                (session_id, json.dumps(message, default=str), session_id),
+            ).lastrowid
+            (position,) = conn.execute("SELECT seq FROM messages WHERE rowid = ?", (rowid,)).fetchone()
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id))
+        return position
+
+    def update_message(self, session_id, position, message):
+        with closing(self._connect()) as conn, conn:
+            updated = conn.execute(
+                "UPDATE messages SET message = ? WHERE session_id = ? AND seq = ?",
+                (json.dumps(message, default=str), session_id, position),
+            ).rowcount
+            if not updated:
+                raise KeyError((session_id, position))
+            conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id))
+
+    def get_cached_analysis(self, dataset_hash, instruction):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT result FROM analyses WHERE dataset_hash = ? AND instruction = ?",
+                (dataset_hash, instruction),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cache_analysis(self, dataset_hash, instruction, result):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (dataset_hash, instruction, result, created_at) VALUES (?, ?, ?, ?)",
+                (dataset_hash, instruction, json.dumps(result, default=str), time.time()),
+            )
+
+def _sqlite_path(location):
+    # sqlite:///relative/path.db and sqlite:////absolute/path.db, as in SQLAlchemy URLs
+    return location[1:] if location.startswith("/") else location
+
+# Registered backends by URL scheme; each factory receives the part after "://"
+STORE_BACKENDS = {
+    "memory": lambda location: InMemorySessionStore(),
+    "sqlite": lambda location: SQLiteSessionStore(_sqlite_path(location)),
+}
+
+def get_session_store(url=None):
+    """
+    Create the session store configured by a URL
+
+    Args:
+        url (str, optional): Store URL such as memory:// or sqlite:///data/sessions.db,
+            defaults to DATAJAR_SESSION_STORE or memory://
+
+    Returns:
+        SessionStore: The configured store
+
+    Raises:
+        ValueError: If the URL scheme has no registered backend
+    """
+    url = url or os.environ.get("DATAJAR_SESSION_STORE", DEFAULT_STORE_URL)
+    scheme, _, location = url.partition("://")
+    if scheme not in STORE_BACKENDS:
+        raise ValueError(f"Unknown session store '{scheme}', expected one of: {', '.join(STORE_BACKENDS)}")
+    return STORE_BACKENDS[scheme](location)
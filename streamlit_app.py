@@ -2,8 +2,13 @@ import streamlit as st
 import time
 import os
 from openai_handler import get_openai_response, get_streaming_response, generate_pandasai_instruction, classify_user_prompt
-from pandasai_handler import initialize_smart_df, ask_pandasai
-from project_setup.project_setup import load_project_setup
+from pandasai_handler import ask_pandasai
+from project_setup.project_setup import load_project_setup, ensure_active_dataset
+from session_recorder import record_turn
+from chat_history import render_chat_history, reset_history_window, load_chart_bytes, pandas_result_to_message
+from progressive_analysis import use_progressive, run_preview, describe_preview, start_exact_analysis, resolve_pending_exact
+from warmup import get_warmup_result, get_smart_df
+from session_persistence import restore_session, persist_session, get_cached_analysis, cache_analysis, cache_analysis_when_done
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +17,9 @@ st.set_page_config(
     layout="centered"
 )
 
+# Resume the conversation and datasets of a stored session (datasets load lazily)
+restore_session()
+
 # Get query parameters for navigation
 page = st.query_params.get("page", "chat")
 
@@ -59,7 +67,7 @@ else:
 
 # Navigation button
 if st.sidebar.button("📁 Project Setup"):
-    st.query_params = {"page": "project-setup"}
+    st.query_params["page"] = "project-setup"
     st.rerun()
 
 # Footer information
@@ -79,13 +87,25 @@ else:  # Default to chat
             {"role": "assistant", "content": "Hi! How can I help you analyze your ads today?"}
         ]
 
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-            # Display chart if the message contains a chart path
-            if message.get("chart_path"):
-                st.image(message["chart_path"], use_column_width=True)
+    # Show insights precomputed by the background warm-up of the active dataset
+    if "df" in st.session_state:
+        warmup = get_warmup_result(st.session_state)
+        if warmup and warmup["insights"]:
+            with st.expander(f"💡 Quick insights on {st.session_state.get('csv_filename', 'your data')}"):
+                for insight in warmup["insights"]:
+                    st.markdown(f"**{insight['title']}** — {insight['summary']}")
+                    if insight["type"] == "line_chart":
+                        st.line_chart(insight["data"])
+                    else:
+                        st.dataframe(insight["data"])
+        elif "warmup" in st.session_state and not st.session_state["warmup"]["insights"].done():
+            st.caption("⏳ Preparing your dataset in the background...")
+
+    # Swap in exact answers that finished in the background since the last rerun
+    resolve_pending_exact(st.session_state)
+
+    # Display the most recent chat messages (older ones stay collapsed)
+    render_chat_history(st.session_state.messages)
 
     # Stream response with a realistic typing effect
     def stream_response(text):
@@ -96,10 +116,35 @@ else:  # Default to chat
             yield word + " "
             time.sleep(0.04)  # Delay between words for realistic typing effect
 
+    def show_pandas_result(placeholder, pandas_result):
+        """
+        Display an ask_pandasai result in a placeholder, according to its type
+        """
+        if pandas_result["type"] == "text":
+            placeholder.markdown(pandas_result["response"])
+        elif pandas_result["type"] == "dataframe":
+            placeholder.dataframe(pandas_result["response"])
+        elif pandas_result["type"] == "plot":
+            # Show PandasAI response
+            placeholder.markdown(pandas_result["response"])
+
+            # Show chart if it exists (cached so later reruns don't re-read it from disk)
+            chart_path = pandas_result.get("filepath")
+            chart_bytes = load_chart_bytes(chart_path) if chart_path else None
+            if chart_bytes:
+                placeholder.image(chart_bytes, caption="📊 Here's your chart", use_column_width=True)
+        elif pandas_result["type"] == "error":
+            placeholder.error(pandas_result["response"])
+
     # Handle user input
     if prompt := st.chat_input("Ask me anything..."):
         # Add user message to chat history
         st.session_state.messages.append({"role": "user", "content": prompt})
+        record_turn(st.session_state, prompt)
+        reset_history_window()
+
+        # A restored session's active dataset is only loaded once a question needs it
+        ensure_active_dataset()
         
         # Display user message
         with st.chat_message("user"):
@@ -114,7 +159,7 @@ else:  # Default to chat
         st.session_state["mode"] = mode
         
         # Route the request based on classification
-        if mode == "data_analysis" and "df" in st.session_state and "sdf" in st.session_state:
+        if mode == "data_analysis" and "df" in st.session_state:
             # Generate PandasAI instruction using GPT
             with st.spinner("Analyzing your question..."):
                 pandas_prompt = generate_pandasai_instruction(prompt, df=st.session_state["df"])
@@ -122,50 +167,48 @@ else:  # Default to chat
             # Execute via PandasAI
             with st.chat_message("assistant"):
                 message_placeholder = st.empty()
-                with st.spinner("Processing data..."):
-                    pandas_result = ask_pandasai(st.session_state["sdf"], pandas_prompt)
-                    
-                    # Handle different result types
-                    if pandas_result["type"] == "text":
-                        message_placeholder.markdown(pandas_result["response"])
-                        # Save assistant message
-                        st.session_state.messages.append({"role": "assistant", "content": pandas_result["response"]})
-                    elif pandas_result["type"] == "dataframe":
-                        # Display the dataframe
-                        message_placeholder.dataframe(pandas_result["response"])
-                        # Also save a text description
-                        result_text = f"Here's the requested data analysis result."
-                        st.session_state.messages.append({"role": "assistant", "content": result_text})
-                    elif pandas_result["type"] == "plot":
-                        result_text = pandas_result["response"]
-                        chart_path = pandas_result.get("filepath")
-
-                        # Show PandasAI response
-                        message_placeholder.markdown(result_text)
-
-                        # Show chart if it exists
-                        if chart_path and os.path.exists(chart_path):
-                            message_placeholder.image(chart_path, caption="📊 Here's your chart", use_column_width=True)
-
-                        # Save response to chat history
-                        chat_message = {
-                            "role": "assistant",
-                            "content": result_text
-                        }
-                        if chart_path:
-                            chat_message["chart_path"] = chart_path
-
+                caption_placeholder = st.empty()
+                df = st.session_state["df"]
+                # Same instruction on the same dataset contents: reuse the stored answer
+                cached_result = get_cached_analysis(pandas_prompt)
+
+                if cached_result is None and use_progressive(df):
+                    # Large dataset: start the full-data analysis right away, and meanwhile
+                    # answer on a stratified sample so the user isn't kept waiting for it
+                    exact_future = start_exact_analysis(df, pandas_prompt)
+                    cache_analysis_when_done(pandas_prompt, exact_future)
+                    with st.spinner("Estimating from a sample..."):
+                        preview = run_preview(df, pandas_prompt)
+
+                    if exact_future.done():
+                        # The exact answer beat the preview; no need to show an estimate
+                        pandas_result = exact_future.result()
+                        show_pandas_result(message_placeholder, pandas_result)
+                        st.session_state.messages.append(pandas_result_to_message(pandas_result))
+                    else:
+                        show_pandas_result(message_placeholder, preview["result"])
+                        caption_placeholder.caption(f"{describe_preview(preview)} Refining on all rows...")
+                        # The preview is swapped for the exact answer on a later rerun once it's ready,
+                        # even if the user moves on before then
+                        chat_message = pandas_result_to_message(preview["result"])
+                        chat_message["approximate"] = describe_preview(preview)
                         st.session_state.messages.append(chat_message)
-                    elif pandas_result["type"] == "error":
-                        message_placeholder.error(pandas_result["response"])
-                        # Save error message
-                        st.session_state.messages.append({"role": "assistant", "content": f"Error: {pandas_result['response']}"})
-                    
-                    # Developer Expander to show debug information
-                    with st.expander("🧠 Developer Debug Info"):
-                        st.markdown(f"**Mode:** `{mode}`")
-                        st.markdown("**PandasAI Instruction:**")
-                        st.code(pandas_prompt, language="markdown")
+                        st.session_state.setdefault("pending_exact", {})[len(st.session_state.messages) - 1] = exact_future
+                else:
+                    if cached_result is not None:
+                        pandas_result = cached_result
+                    else:
+                        with st.spinner("Processing data..."):
+                            pandas_result = ask_pandasai(get_smart_df(st.session_state), pandas_prompt)
+                        cache_analysis(pandas_prompt, pandas_result)
+                    show_pandas_result(message_placeholder, pandas_result)
+                    st.session_state.messages.append(pandas_result_to_message(pandas_result))
+
+                # Developer Expander to show debug information
+                with st.expander("🧠 Developer Debug Info"):
+                    st.markdown(f"**Mode:** `{mode}`")
+                    st.markdown("**PandasAI Instruction:**")
+                    st.code(pandas_prompt, language="markdown")
         else:
             # Use regular OpenAI response for chat mode
             # Get and display assistant response
@@ -194,3 +237,17 @@ else:  # Default to chat
                 # Developer Debug Info for chat mode
                 with st.expander("🧠 Developer Debug Info"):
                     st.markdown(f"**Mode:** `{mode}`")
+
+    # Rerun once a background exact answer is ready, so it replaces its preview without
+    # waiting for the next interaction (st.fragment needs Streamlit 1.37+; on older
+    # versions the swap happens on the next rerun)
+    if st.session_state.get("pending_exact") and hasattr(st, "fragment"):
+        @st.fragment(run_every=2)
+        def poll_pending_exact():
+            if any(future.done() for future in st.session_state.get("pending_exact", {}).values()):
+                st.rerun()
+
+        poll_pending_exact()
+
+# Save the conversation and dataset references so the session survives reloads and restarts
+persist_session()
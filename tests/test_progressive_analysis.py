@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from progressive_analysis import estimate_errors, stratified_sample
+
+def _campaign_frame(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "campaign_name": rng.choice([f"Campaign {i}" for i in range(10)], size=rows),
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, size=rows), unit="D"),
+        "spend": rng.gamma(2.0, 50.0, size=rows),
+        "clicks": rng.integers(0, 500, size=rows),
+    })
+
+def test_stratified_sample_keeps_every_campaign():
+    df = _campaign_frame()
+    sample, fraction, strata = stratified_sample(df, sample_rows=2_000)
+
+    assert strata == ["campaign", "week"]
+    assert fraction == 2_000 / len(df)
+    assert abs(len(sample) - 2_000) < 200
+    assert set(sample["campaign_name"]) == set(df["campaign_name"])
+
+def test_estimate_errors_on_stratified_sample():
+    df = _campaign_frame()
+    sample, fraction, _ = stratified_sample(df, sample_rows=2_000)
+
+    margins = estimate_errors(sample, fraction, "Show the average spend per campaign")
+
+    assert list(margins) == ["spend"]
+    assert 0 < margins["spend"] < 20
+
+def test_estimate_errors_without_strata():
+    df = pd.DataFrame({"spend": np.arange(1, 1_001, dtype=float)})
+    sample, fraction, strata = stratified_sample(df, sample_rows=100)
+
+    assert strata == []
+    margins = estimate_errors(sample, fraction, "Total spend")
+    assert 0 < margins["spend"] < 50
@@ -0,0 +1,187 @@
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from openai_handler import get_dataframe_metadata
+from pandasai_handler import initialize_smart_df
+
+# Shared by all sessions; warm-ups are short and mostly pandas work
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="datajar-warmup")
+
+# Column name candidates used to recognize common ad metrics
+CAMPAIGN_COLUMNS = ["campaign_name", "campaign", "campaign_id", "ad_name", "ad_set"]
+SPEND_COLUMNS = ["spend", "amount_spent", "cost", "ad_spend"]
+REVENUE_COLUMNS = ["revenue", "purchase_value", "conversion_value", "sales"]
+DATE_COLUMNS = ["date", "day", "date_start", "reporting_starts"]
+
+def find_column(df, candidates):
+    """Return the first column whose normalized name matches (or contains) a candidate."""
+    normalized = {col: str(col).strip().lower().replace(" ", "_") for col in df.columns}
+    for candidate in candidates:
+        for col, name in normalized.items():
+            if name == candidate:
+                return col
+    for candidate in candidates:
+        for col, name in normalized.items():
+            if candidate in name:
+                return col
+    return None
+
+def _top_campaigns(df, campaign_col, spend_col, revenue_col):
+    """Summarize spend (and ROAS when revenue is known) per campaign."""
+    metrics = [spend_col] + ([revenue_col] if revenue_col else [])
+    summary = df.groupby(campaign_col)[metrics].sum(numeric_only=True)
+    if revenue_col:
+        summary["roas"] = (summary[revenue_col] / summary[spend_col].where(summary[spend_col] > 0)).round(2)
+    return summary
+
+def _ctr_trend(df, date_col):
+    """Weekly CTR, computed from clicks/impressions when available."""
+    clicks_col = find_column(df, ["clicks", "link_clicks"])
+    impressions_col = find_column(df, ["impressions"])
+    ctr_col = find_column(df, ["ctr"])
+
+    dates = pd.to_datetime(df[date_col], errors="coerce")
+    weeks = dates.dt.to_period("W").dt.start_time
+    if clicks_col and impressions_col:
+        weekly = df.groupby(weeks)[[clicks_col, impressions_col]].sum()
+        trend = weekly[clicks_col] / weekly[impressions_col].where(weekly[impressions_col] > 0) * 100
+    elif ctr_col:
+        trend = pd.to_numeric(df[ctr_col], errors="coerce").groupby(weeks).mean()
+    else:
+        return None
+    trend = trend.dropna().round(3)
+    trend.index.name = "week"
+    return trend.rename("ctr")
+
+def compute_insights(df):
+    """
+    Compute a few high-value summaries of an ad/campaign dataset without any LLM call
+
+    Args:
+        df (pandas.DataFrame): Active dataset
+
+    Returns:
+        list: Insight dicts with "title", "type" ("dataframe" or "line_chart"), "data" and "summary"
+    """
+    insights = []
+    campaign_col = find_column(df, CAMPAIGN_COLUMNS)
+    spend_col = find_column(df, SPEND_COLUMNS)
+    revenue_col = find_column(df, REVENUE_COLUMNS)
+    date_col = find_column(df, DATE_COLUMNS)
+
+    if campaign_col and spend_col:
+        try:
+            summary = _top_campaigns(df, campaign_col, spend_col, revenue_col)
+            by_spend = summary.nlargest(5, spend_col)
+            insights.append({
+                "title": "Top campaigns by spend",
+                "type": "dataframe",
+                "data": by_spend.reset_index(),
+                "summary": f"**{by_spend.index[0]}** has the highest spend ({by_spend[spend_col].iloc[0]:,.2f}).",
+            })
+            if revenue_col:
+                # Ignore tiny campaigns so a single lucky conversion doesn't top the list
+                significant = summary[summary[spend_col] >= summary[spend_col].median()]
+                by_roas = significant.nlargest(5, "roas")
+                insights.append({
+                    "title": "Top campaigns by ROAS",
+                    "type": "dataframe",
+                    "data": by_roas.reset_index(),
+                    "summary": f"**{by_roas.index[0]}** has the best ROAS ({by_roas['roas'].iloc[0]:.2f}).",
+                })
+        except Exception as e:
+            print(f"[Warm-up] Campaign insights failed: {e}")
+
+    if date_col:
+        try:
+            trend = _ctr_trend(df, date_col)
+            if trend is not None and len(trend) > 1:
+                change = trend.iloc[-1] - trend.iloc[0]
+                insights.append({
+                    "title": "Weekly CTR trend",
+                    "type": "line_chart",
+                    "data": trend,
+                    "summary": f"CTR went from {trend.iloc[0]:.2f}% to {trend.iloc[-1]:.2f}% "
+                               f"({'+' if change >= 0 else ''}{change:.2f} pts) over {len(trend)} weeks.",
+                })
+        except Exception as e:
+            print(f"[Warm-up] CTR trend failed: {e}")
+
+    return insights
+
+def _timed_insights(df, started):
+    insights = compute_insights(df)
+    return {"insights": insights, "duration_s": round(time.perf_counter() - started, 3)}
+
+def start_warmup(df):
+    """
+    Prepare a newly activated dataset on background threads
+
+    The SmartDataframe and the profile (shared through get_dataframe_metadata) are
+    submitted first and published as futures of their own, so a question never waits
+    for the speculative insights.
+
+    Args:
+        df (pandas.DataFrame): Dataset that just became active
+
+    Returns:
+        dict: Futures "sdf" (SmartDataframe), "metadata" (get_dataframe_metadata result)
+              and "insights" (dict with "insights" and "duration_s")
+    """
+    started = time.perf_counter()
+    return {
+        "sdf": _executor.submit(initialize_smart_df, df),
+        "metadata": _executor.submit(get_dataframe_metadata, df),
+        "insights": _executor.submit(_timed_insights, df, started),
+    }
+
+def get_warmup_result(session_state, wait=False):
+    """
+    Get the precomputed insights of the active dataset
+
+    Args:
+        session_state: Streamlit session state
+        wait (bool): Block until the insights are ready instead of returning None
+
+    Returns:
+        dict or None: "insights" and "duration_s", or None if they aren't available (yet)
+    """
+    warmup = session_state.get("warmup")
+    future = warmup["insights"] if warmup else None
+    if future is None or (not wait and not future.done()):
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"[Warm-up] Failed: {e}")
+        return None
+
+def get_smart_df(session_state):
+    """
+    Get the SmartDataframe of the active dataset, from the warm-up when it has built it
+
+    Args:
+        session_state: Streamlit session state
+
+    Returns:
+        SmartDataframe or None: None if no dataset is active
+    """
+    if "sdf" in session_state:
+        return session_state["sdf"]
+    if "df" not in session_state:
+        return None
+
+    sdf = None
+    warmup = session_state.get("warmup")
+    # A build still queued behind other warm-ups is cancelled and done here instead;
+    # one already running takes milliseconds, so wait for it
+    if warmup and not warmup["sdf"].cancel():
+        try:
+            sdf = warmup["sdf"].result()
+        except Exception as e:
+            print(f"[Warm-up] SmartDataframe failed: {e}")
+    if sdf is None:
+        sdf = initialize_smart_df(session_state["df"])
+    session_state["sdf"] = sdf
+    return sdf